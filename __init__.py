@@ -2,22 +2,36 @@ from __future__ import annotations
 
 import os
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
-from homeassistant.const import Platform, CONF_SCAN_INTERVAL
+from homeassistant.const import Platform, CONF_HOST, CONF_SCAN_INTERVAL
 from homeassistant.core import HomeAssistant
 
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from homeassistant.helpers.aiohttp_client import async_get_clientsession  
-
-from homeassistant.exceptions import HomeAssistantError
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 
+from .batch_reader import BatchReader
+from .connection import PLCConnection, create_session
 from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, CONF_ELEMENTS, CONF_SETTINGS_GROUP_NAME, DEFAULT_SETTINGS_INTERVAL, CONF_SYM_FILE
+from .const import CONF_READ_CHUNK_SIZE, CONF_READ_CONCURRENCY, DEFAULT_READ_CHUNK_SIZE, DEFAULT_READ_CONCURRENCY
+from .const import CONF_MOTION_POLL_INTERVAL, DEFAULT_MOTION_POLL_INTERVAL
+from .const import CONF_PROFILING, CONF_PROFILE_THRESHOLD, DEFAULT_PROFILE_THRESHOLD
 from .coordinator import IntegrationCoordinator
+from .device_index import DeviceIndex
+from .hot_reload import async_apply_elements, async_remove_devices, diff_elements, only_elements_changed
+from .hub import async_get_hub
+from .poll_scheduler import PollScheduler
+from .profiler import PollProfiler
+from .read_plan import group_name_for, poll_groups, without_values
+from .symbol_index import remove_index
+from .value_cache import ValueCache
+from .write_queue import WriteQueue
+
+from wago_visu_client import WagoPLC as API
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,6 +49,9 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
+# groups loaded in the background after the platforms are set up
+SLOW_GROUPS = ("hourly", CONF_SETTINGS_GROUP_NAME)
+
 type MyConfigEntry = ConfigEntry[RuntimeData]
 
 
@@ -44,50 +61,104 @@ class RuntimeData:
 
     coordinators: dict[str, DataUpdateCoordinator] 
     cancel_update_listener: Callable
+    write_queue: WriteQueue
+    scheduler: PollScheduler
+    connection: PLCConnection
+    value_cache: ValueCache
+    device_index: DeviceIndex
+    options: dict = field(default_factory=dict)     # the options the entry runs with
+    platforms: list = field(default_factory=list)   # [(platform, entities_for, async_add_entities)]
+
+    def coordinator_for(self, elem: dict) -> IntegrationCoordinator:
+        """Return the coordinator polling the element (see read_plan.group_name_for)."""
+        return self.coordinators[group_name_for(elem)]
+
+    def add_platform(self, platform: Platform, entities_for: Callable, async_add_entities: Callable) -> None:
+        """Register how a platform creates entities of elements added after the setup."""
+        self.platforms.append((platform, entities_for, async_add_entities))
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) -> bool:
     """Set up Example Integration from a config entry."""
     
-    # Get a shared async session (pre-configured with HA's proxy, etc.)
-    session = async_get_clientsession(hass)
+    # The integration's own session - a few kept-alive connections to the PLC,
+    # one per concurrent read and one for writes
+    session = create_session(config_entry.options.get(CONF_READ_CONCURRENCY, DEFAULT_READ_CONCURRENCY) + 1)
+    # closed when the entry is unloaded, and also when the setup fails at any step
+    config_entry.async_on_unload(session.close)
+
+    # one connection tracks the health of the PLC for all reads and writes
+    connection = PLCConnection(API(config_entry.data[CONF_HOST], session))
+
+    # All writes to the PLC go through one queue, which merges writes made
+    # at (almost) the same time into one request
+    write_queue = WriteQueue(connection)
+
+    # All reads share one reader, so they respect one concurrency limit
+    reader = BatchReader(
+        connection,
+        config_entry.options.get(CONF_READ_CHUNK_SIZE, DEFAULT_READ_CHUNK_SIZE),
+        config_entry.options.get(CONF_READ_CONCURRENCY, DEFAULT_READ_CONCURRENCY),
+    )
 
     # ----------------------------------------------------------------------------
     # Initialise the coordinators that manages data updates from your api.
     # This is defined in coordinator.py
+    # One coordinator per poll group: the named groups and one group per
+    # poll_interval used in the elements. The scheduler polls all of them,
+    # merging the groups due at the same time into one read.
     # ----------------------------------------------------------------------------
 
-    coordinators = {
-        "live": IntegrationCoordinator(
-            hass,
-            config_entry, 
-            session,
-            "live", 
-            config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-        ),
-        "hourly": IntegrationCoordinator(
-            hass,
-            config_entry, 
-            session,
-            "hourly",
-            3600
-        ),
-        CONF_SETTINGS_GROUP_NAME: IntegrationCoordinator(
-            hass, 
-            config_entry,
-            session,
-            CONF_SETTINGS_GROUP_NAME,
-            DEFAULT_SETTINGS_INTERVAL
-        ),
+    groups = {
+        "live": config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        "hourly": 3600,
+        CONF_SETTINGS_GROUP_NAME: DEFAULT_SETTINGS_INTERVAL,
     }
+    groups.update(poll_groups(config_entry.options.get(CONF_ELEMENTS, [])))
+
+    # Optional profiling - polls slower than the threshold are traced to <config>/wago_plc/
+    profiler = None
+    if config_entry.options.get(CONF_PROFILING, False):
+        profiler = PollProfiler(
+            hass,
+            hass.config.path(DOMAIN, f"poll_trace_{config_entry.entry_id}.jsonl"),
+            config_entry.options.get(CONF_PROFILE_THRESHOLD, DEFAULT_PROFILE_THRESHOLD),
+        )
+
+    scheduler = PollScheduler(hass, reader, config_entry.options.get(CONF_MOTION_POLL_INTERVAL, DEFAULT_MOTION_POLL_INTERVAL), connection, profiler)
+    value_cache = ValueCache(hass, config_entry.entry_id)
+    device_index = DeviceIndex(config_entry.options.get(CONF_ELEMENTS, []))
+    coordinators = {}
+    for group_name, interval in groups.items():
+        coordinators[group_name] = IntegrationCoordinator(hass, config_entry, session, group_name, interval, write_queue, reader, device_index)
+        scheduler.add(coordinators[group_name])
+        value_cache.add(coordinators[group_name])
+
+    # Values stored before the restart are served (marked stale) until the first poll
+    restored = await value_cache.async_restore()
+
+    # groups read in the first scheduler tick, after the platforms are set up
+    due_in = {group_name: 0 for group_name in SLOW_GROUPS}
+
+    if restored:
+        # no need to wait for the PLC - all groups are confirmed in the background
+        due_in = {group_name: 0 for group_name in coordinators}
+    else:
+        # Initial refresh - all groups except the slow ones in one read. The slow groups
+        # (settings...) are loaded in the background once the platforms are set up,
+        # their entities are unavailable until then.
+        try:
+            await scheduler.async_refresh_groups(
+                coordinator for group_name, coordinator in coordinators.items() if group_name not in SLOW_GROUPS
+            )
+        except Exception as err:
+            raise ConfigEntryNotReady(f"Failed initial data from {config_entry.data[CONF_HOST]}: {err}") from err
 
-    # Initial refresh for all
-    for coord in coordinators.values():
-        await coord.async_config_entry_first_refresh()
-        
-        # commented out, because if there are no devices the coord.data = [] and it is fine...
-        # if not coord.data:
-        #    raise ConfigEntryNotReady(f"Failed initial data for {coord.group_name}")
+    # slow groups restored from a poll made within their interval are not read again at startup
+    for group_name in SLOW_GROUPS:
+        age = value_cache.age(group_name)
+        if group_name in restored and age is not None and age < coordinators[group_name].poll_interval:
+            due_in[group_name] = coordinators[group_name].poll_interval - age
 
     # ----------------------------------------------------------------------------
     # Initialise a listener for config flow options changes.
@@ -100,7 +171,9 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) ->
     # Add the coordinator and update listener to your config entry to make
     # accessible throughout your integration
     # ----------------------------------------------------------------------------
-    config_entry.runtime_data = RuntimeData(coordinators, cancel_update_listener)
+    config_entry.runtime_data = RuntimeData(
+        coordinators, cancel_update_listener, write_queue, scheduler, connection, value_cache, device_index, options=dict(config_entry.options)
+    )
 
     # ----------------------------------------------------------------------------
     # Setup platforms (based on the list of entity types in PLATFORMS defined above)
@@ -108,6 +181,11 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) ->
     # ----------------------------------------------------------------------------
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    # start polling, the first tick loads the groups not loaded yet - at the phase
+    # the hub gives this controller, so several controllers are not polled at once
+    async_get_hub(hass).async_add(config_entry.entry_id, scheduler)
+    scheduler.async_start(due_in)
+
     # Return true to denote a successful setup.
     return True
 
@@ -115,11 +193,29 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) ->
 async def _async_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
     """Handle config options update.
 
-    Reload the integration when the options change.
+    Changed elements (or a new SYM file) are applied in place - only the entities of
+    added, removed and changed devices are touched (see hot_reload.py). Any other
+    change reloads the integration.
     Called from our listener created above.
     """
+    runtime_data = config_entry.runtime_data
+    if runtime_data is None:
+        return
+
+    if only_elements_changed(runtime_data.options, config_entry.options):
+        try:
+            await async_apply_elements(hass, config_entry)
+        except Exception as err:
+            _LOGGER.warning("Applying the changed elements failed (%s); reloading config entry %s", err, config_entry.entry_id)
+        else:
+            runtime_data.options = dict(config_entry.options)
+            return
+
+    # devices not configured anymore are not recreated by the reload - remove them from the registry
+    diff = diff_elements(runtime_data.options.get(CONF_ELEMENTS, []), config_entry.options.get(CONF_ELEMENTS, []))
     _LOGGER.debug("Options changed; reloading config entry %s", config_entry.entry_id)
     await hass.config_entries.async_reload(config_entry.entry_id)
+    async_remove_devices(hass, config_entry, diff.removed)
 
 
 async def async_remove_config_entry_device(
@@ -143,12 +239,17 @@ async def async_remove_config_entry_device(
         _LOGGER.warning("Deleted device has no matching identifier for domain %s; skipping cleanup", DOMAIN)
         return True  # Allow deletion anyway, as it might be a foreign device
 
-    # Step 2: Get current elements list (default to empty list if missing)
+    # Step 2: Nothing to do for devices without elements (e.g. the device of the diagnostic sensors)
+    if config_entry.runtime_data is not None and device_id not in config_entry.runtime_data.device_index:
+        _LOGGER.debug("No matching element found for device_id %s; no changes to elements", device_id)
+        return True
+
+    # Get current elements list (default to empty list if missing)
     elements = config_entry.options.get(CONF_ELEMENTS, []).copy()  # Copy to avoid mutating original
 
     # Step 3: Filter out the element matching the device_id
     original_count = len(elements)
-    elements = [elem for elem in elements if elem.get("device_id") != device_id]
+    elements = [without_values(elem) for elem in elements if elem.get("device_id") != device_id]
 
     if len(elements) == original_count:
         _LOGGER.debug("No matching element found for device_id %s; no changes to elements", device_id)
@@ -175,20 +276,32 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: MyConfigEntry) -
     If you have created any custom services, they need to be removed here too.
     """
   
-    # Unload platforms
+    # Unload platforms - the entry stays set up when this fails
     unload_ok = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    if not unload_ok:
+        return False
     
-    # Unload services explicitly
-    domain_services = hass.services.async_services_for_domain(DOMAIN)
-    for service in domain_services:
-        hass.services.async_remove(DOMAIN, service)
-    
-    # Optional: Clean up any other resources (e.g., if coordinator has custom shutdown)
-    if hasattr(config_entry.runtime_data, 'coordinator'):
-        # If your coordinator has an async_shutdown method, call it here
-        # await config_entry.runtime_data.coordinator.async_shutdown()
-        pass
+    # Unload services explicitly - they are shared by all controllers, so only with the last one
+    other_entries = [
+        entry for entry in hass.config_entries.async_loaded_entries(DOMAIN) if entry.entry_id != config_entry.entry_id
+    ]
+    if not other_entries:
+        domain_services = hass.services.async_services_for_domain(DOMAIN)
+        for service in domain_services:
+            hass.services.async_remove(DOMAIN, service)
     
+    # Stop polling, drop writes and post-write refreshes which were not sent yet and keep
+    # the last values for the next start - the session is closed after this (see async_setup_entry)
+    if config_entry.runtime_data is not None:
+        async_get_hub(hass).async_remove(config_entry.entry_id)
+        config_entry.runtime_data.scheduler.async_stop()
+        for coordinator in config_entry.runtime_data.coordinators.values():
+            await coordinator.async_shutdown()
+        config_entry.runtime_data.write_queue.shutdown()
+        await config_entry.runtime_data.value_cache.async_save()
+        if config_entry.runtime_data.scheduler.profiler is not None:
+            await config_entry.runtime_data.scheduler.profiler.async_close()
+
     # Clear runtime data
     config_entry.runtime_data = None
     
@@ -207,3 +320,10 @@ async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
             _LOGGER.error("Failed to delete SYM file %s: %s", sym_file, err)
     else:
         _LOGGER.debug("No SYM file found to clean up")
+
+    # the symbol index stored next to the SYM file
+    if sym_file:
+        await hass.async_add_executor_job(remove_index, sym_file)
+
+    # the last known values
+    await ValueCache(hass, config_entry.entry_id).async_remove()
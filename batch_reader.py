@@ -0,0 +1,73 @@
+# Chunked and concurrent reads on top of wago_visu_client.WagoPLC.get_data
+
+import asyncio
+import logging
+from typing import Any
+
+from wago_visu_client import WagoPLC as API
+
+from .const import DEFAULT_READ_CHUNK_SIZE, DEFAULT_READ_CONCURRENCY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ResponseMismatch(Exception):
+    """Error to indicate the PLC returned a different number of values than requested."""
+
+
+class BatchReader:
+    """Read long address lists in chunks with bounded concurrency.
+
+    The webvisu endpoint of Codesys 2.3 does not cope well with very long requests,
+    so the addresses are split into chunks of 'chunk_size' which are sent at most
+    'concurrency' at a time over the shared session. The values are reassembled in
+    request order. A chunk which fails or returns the wrong number of values leaves
+    None in its positions - only when every chunk fails the whole read fails.
+    """
+
+    def __init__(self, api: API, chunk_size: int = DEFAULT_READ_CHUNK_SIZE, concurrency: int = DEFAULT_READ_CONCURRENCY) -> None:
+        self.api = api
+        self.chunk_size = max(1, int(chunk_size))
+        self._semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+        self.failed_chunks = 0      # chunks lost to connection errors
+        self.mismatched_chunks = 0  # chunks with a wrong number of values returned
+        self.requests = 0
+        self.bytes_sent = 0         # size of the request/response bodies ("|0|2|0|addr|1|addr|" / "|v|v|")
+        self.bytes_received = 0
+
+    async def _read_chunk(self, addrs: list[str]) -> list[Any]:
+        self.requests += 1
+        self.bytes_sent += len(f"|0|{len(addrs)}|") + sum(len(addr) + len(str(index)) + 2 for index, addr in enumerate(addrs))
+        async with self._semaphore:
+            values = await self.api.get_data(addrs)
+        self.bytes_received += 1 + sum(len(value) + 1 for value in values)
+        if len(values) != len(addrs):
+            self.mismatched_chunks += 1
+            raise ResponseMismatch(f"Response length mismatch: expected {len(addrs)}, got {len(values)}")
+        return values
+
+    async def read(self, addrs: list[str]) -> list[Any]:
+        """Read all addresses, returning values in order (None for lost chunks)."""
+        if len(addrs) <= self.chunk_size:
+            return await self._read_chunk(addrs)
+
+        chunks = [addrs[i:i + self.chunk_size] for i in range(0, len(addrs), self.chunk_size)]
+        results = await asyncio.gather(*(self._read_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        values: list[Any] = []
+        errors: list[BaseException] = []
+        for index, (chunk, result) in enumerate(zip(chunks, results)):
+            if isinstance(result, BaseException):
+                if not isinstance(result, ResponseMismatch):
+                    self.failed_chunks += 1
+                _LOGGER.warning("Chunk %d/%d (%d addresses) failed: %s", index + 1, len(chunks), len(chunk), result)
+                errors.append(result)
+                values.extend([None] * len(chunk))
+            else:
+                values.extend(result)
+
+        if len(errors) == len(chunks):
+            raise errors[0]
+
+        return values
@@ -0,0 +1,244 @@
+# Benchmarks of the hot paths of the integration
+#
+# Times, for synthetic projects of growing size (see synthetic.py):
+#   - full SYM_XML parsing (SymbolIndex.from_string)
+#   - bulk resolution of element addresses (resolve_elements)
+#   - the poll of the PollScheduler - one merged read of all groups (through a
+#     PLCConnection to a local stub of WagoPLC), split and applied per group
+#   - IntegrationCoordinator.async_update_data, the fallback poll of a single group
+#   - entity setup in every platform's async_setup_entry
+#
+# and reports latency percentiles (p50/p90/p99) and peak allocations.
+#
+# Usage (from the repository root, in an environment with Home Assistant installed):
+#   python benchmarks/run_benchmarks.py
+#   python benchmarks/run_benchmarks.py --sizes 100 1000 --repeat 50 --output bench_output.txt
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from synthetic import build_project
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "wago_plc"
+PLATFORMS = ["binary_sensor", "cover", "light", "number", "sensor", "switch"]
+
+DEFAULT_SIZES = [100, 1000, 5000, 10000]
+EXTRA_VARS_PER_ELEMENT = 5  # the example project has ~5 unused variables per configured one
+
+
+def load_integration():
+    """Import the repository as the 'wago_plc' package (it uses relative imports)."""
+    spec = importlib.util.spec_from_file_location(PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubPLC:
+    """Local stand-in for wago_visu_client.WagoPLC - returns a value for every address.
+
+    Every 'change_every' polls the values change, so change detection is exercised too.
+    """
+
+    def __init__(self, host: str = "stub", session: Any = None, change_every: int = 4) -> None:
+        self.host = host
+        self.session = session
+        self.change_every = change_every
+        self.reads = 0
+
+    async def get_data(self, addrs: list[str]) -> list[str]:
+        self.reads += 1
+        value = str((self.reads // self.change_every) % 2)
+        return [value] * len(addrs)
+
+    async def set_data(self, address: str, value: Any) -> bool:
+        return True
+
+
+class FakeEntry:
+    """Minimal config entry carrying the options the coordinators and entities read."""
+
+    def __init__(self, elements: list[dict[str, Any]]) -> None:
+        self.entry_id = "benchmark"
+        self.unique_id = "benchmark"
+        self.domain = PACKAGE
+        self.data = {"host": "stub"}
+        self.options = {"elements": elements}
+        self.runtime_data = None
+
+    def async_on_unload(self, func: Callable[[], Any]) -> None:
+        pass
+
+
+# --------------------------------------------------------------------
+# Measurement
+# --------------------------------------------------------------------
+
+def percentiles(samples: list[float]) -> tuple[float, float, float]:
+    if len(samples) < 2:
+        return samples[0], samples[0], samples[0]
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[89], cuts[98]
+
+
+async def measure(fn: Callable[[], Awaitable[Any] | Any], repeat: int) -> dict[str, float]:
+    """Time 'fn' 'repeat' times, then run it once more under tracemalloc.
+
+    Allocations are measured in a separate pass, so tracing does not distort the timings.
+    """
+    async def call() -> Any:
+        result = fn()
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    await call()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p90, p99 = percentiles(samples)
+    return {"p50": p50, "p90": p90, "p99": p99, "peak_kib": peak / 1024, "retained_kib": current / 1024}
+
+
+# --------------------------------------------------------------------
+# Benchmarks
+# --------------------------------------------------------------------
+
+async def bench_size(integration, hass, size: int, repeat: int) -> list[tuple[str, int, dict[str, float]]]:
+    from homeassistant import config_entries
+
+    symbol_index = importlib.import_module(f"{PACKAGE}.symbol_index")
+    coordinator_module = importlib.import_module(f"{PACKAGE}.coordinator")
+    write_queue_module = importlib.import_module(f"{PACKAGE}.write_queue")
+    connection_module = importlib.import_module(f"{PACKAGE}.connection")
+    batch_reader_module = importlib.import_module(f"{PACKAGE}.batch_reader")
+    poll_scheduler_module = importlib.import_module(f"{PACKAGE}.poll_scheduler")
+
+    xml_content, template = build_project(size, extra_vars=size * EXTRA_VARS_PER_ELEMENT)
+    results = []
+
+    # full SYM parsing
+    index = symbol_index.SymbolIndex.from_string(xml_content)
+    stats = await measure(lambda: symbol_index.SymbolIndex.from_string(xml_content), repeat)
+    stats["size_kib"] = len(xml_content) / 1024
+    results.append(("sym_parse", size, stats))
+
+    # bulk resolution - on fresh copies, as the elements are updated in place, and
+    # without the names resolved by the previous run (kept by the index)
+    def resolve() -> None:
+        index._resolved.clear()
+        errors = symbol_index.resolve_elements([dict(elem) for elem in template], index)
+        if errors:
+            raise RuntimeError(errors[0])
+
+    results.append(("resolve_elements", size, await measure(resolve, repeat)))
+
+    elements = [dict(elem) for elem in template]
+    symbol_index.resolve_elements(elements, index)
+    entry = FakeEntry(elements)
+    config_entries.current_entry.set(entry)
+
+    # one coordinator per group, all polled by one scheduler, as in async_setup_entry
+    connection = connection_module.PLCConnection(StubPLC())
+    reader = batch_reader_module.BatchReader(connection)
+    write_queue = write_queue_module.WriteQueue(connection)
+    scheduler = poll_scheduler_module.PollScheduler(hass, reader, 0, connection)
+    coordinators = {}
+    for group_name in ("live", "hourly", "settings"):
+        coordinator = coordinator_module.IntegrationCoordinator(hass, entry, None, group_name, 3, write_queue, reader)
+        scheduler.add(coordinator)
+        coordinators[group_name] = coordinator
+    entry.runtime_data = integration.RuntimeData(coordinators, None, write_queue, scheduler, connection, None, coordinators["live"].device_index)
+
+    # the poll - the addresses of all due groups in one read, split and applied per group
+    stats = await measure(lambda: scheduler.async_refresh_groups(coordinators.values()), repeat)
+    stats["addrs"] = len({addr for coordinator in coordinators.values() for addr in coordinator.read_plan.addrs})
+    results.append(("scheduler_poll", size, stats))
+
+    # fallback poll of a single group by its coordinator (not used while the scheduler runs)
+    live = coordinators["live"]
+    stats = await measure(live.async_update_data, repeat)
+    stats["addrs"] = len(live.read_plan.addrs)
+    results.append(("fallback_update_data", size, stats))
+
+    # entity setup of every platform
+    for platform in PLATFORMS:
+        try:
+            module = importlib.import_module(f"{PACKAGE}.{platform}")
+        except Exception as err:  # e.g. a device class missing in the installed Home Assistant
+            print(f"skipping {platform}: {err}", file=sys.stderr)
+            continue
+
+        added: list[Any] = []
+
+        def add_entities(entities, update_before_add: bool = False) -> None:
+            added.clear()
+            added.extend(entities)
+
+        # every run sets the platform up as if for the first time
+        def setup_platform(module=module):
+            entry.runtime_data.platforms.clear()
+            return module.async_setup_entry(hass, entry, add_entities)
+
+        stats = await measure(setup_platform, repeat)
+        stats["entities"] = len(added)
+        results.append((f"setup_{platform}", size, stats))
+
+    for coordinator in coordinators.values():
+        coordinator.refresh_scheduler.async_cancel()
+    write_queue.shutdown()
+    return results
+
+
+def format_results(results: list[tuple[str, int, dict[str, float]]]) -> str:
+    lines = [f"{'benchmark':<22}{'elements':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak KiB':>11}  notes"]
+    for name, size, stats in results:
+        notes = ", ".join(f"{key}={stats[key]:.0f}" for key in ("addrs", "entities", "size_kib") if key in stats)
+        lines.append(f"{name:<22}{size:>9}{stats['p50']:>10.3f}{stats['p90']:>10.3f}{stats['p99']:>10.3f}{stats['peak_kib']:>11.1f}  {notes}")
+    return "\n".join(lines)
+
+
+async def main(sizes: list[int], repeat: int) -> str:
+    from homeassistant.core import HomeAssistant
+
+    integration = load_integration()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        results = []
+        for size in sizes:
+            results.extend(await bench_size(integration, hass, size, repeat))
+    return format_results(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the WAGO PLC integration hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of elements to generate")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(main(args.sizes, args.repeat))
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
@@ -0,0 +1,134 @@
+# Synthetic PLC projects for the benchmarks and the simulator
+#
+# The generated SYM_XML mirrors the structure of example_config_files/PLC_Project.SYM_XML:
+# IO variables (".OUT_...", RefId 2) and variables of PLC_PRG function blocks (RefId 3).
+
+import random
+from typing import Any
+
+# TypeId, Size, name - as in the example project
+SIMPLE_TYPES = [
+    ("0", 1, "BOOL"),
+    ("1", 4, "TIME"),
+    ("6", 2, "INT"),
+    ("8", 1, "SINT"),
+    ("11", 4, "DWORD"),
+    ("16", 2, "UINT"),
+    ("23", 4, "REAL"),
+    ("24", 4, "DINT"),
+    ("40", 1, "BYTE"),
+    ("44", 2, "WORD"),
+    ("64", 0, "BOOL"),
+]
+TYPE_IDS = {name: type_id for type_id, _, name in SIMPLE_TYPES if type_id != "64"}
+IO_BOOL = "64"
+
+# share of each device type in a generated element list
+DEVICE_MIX = [
+    ("ON_OFF_LIGHT", 0.40),
+    ("BLIND", 0.20),
+    ("TEMPERATURE_SENSOR", 0.15),
+    ("TEMPERATURE_SETTER", 0.10),
+    ("MOVEMENT_SENSOR", 0.10),
+    ("SWITCH", 0.05),
+]
+
+HEADER = """<?xml version="1.0" encoding="ISO-8859-1"?>
+
+<CoDeSysSymbolTable>
+\t<SymbolHeader>
+\t\t<Version>-1</Version>
+\t\t<ProjectId>137932</ProjectId>
+\t\t<WorkbenchVersion>2.3.9.68</WorkbenchVersion>
+\t\t<CompilerVersion>2.3.9.62</CompilerVersion>
+\t</SymbolHeader>
+"""
+
+
+class ProjectBuilder:
+    """Collects variables and elements of a synthetic project."""
+
+    def __init__(self) -> None:
+        self.vars: list[tuple[str, str, str, int]] = []  # (name, type_id, ref_id, offset)
+        self._io_offset = 0
+        self._prg_offset = 0
+
+    def io_var(self, name: str) -> str:
+        self.vars.append((name, IO_BOOL, "2", self._io_offset))
+        self._io_offset += 1
+        return name
+
+    def prg_var(self, name: str, type_name: str) -> str:
+        size = next(size for _, size, simple in SIMPLE_TYPES if simple == type_name)
+        self.vars.append((name, TYPE_IDS[type_name], "3", self._prg_offset))
+        self._prg_offset += max(size, 1)
+        return name
+
+    def to_xml(self) -> str:
+        lines = [HEADER, "\t<SymbolTypeList>\n"]
+        for type_id, size, name in SIMPLE_TYPES:
+            lines.append(f'\t\t<TypeSimple TypeId="{type_id}" Size="{size}">{name}</TypeSimple>\n')
+        lines.append("\t</SymbolTypeList>\n\t<SymbolVarList>\n")
+        for name, type_id, ref_id, offset in sorted(self.vars):
+            flags = "33554464" if ref_id == "2" else "1073741825"
+            lines.append(f'\t\t<Var Type="{type_id}" Flags="{flags}" Access="98" RefId="{ref_id}" Offset="{offset}">{name}</Var>\n')
+        lines.append("\t</SymbolVarList>\n</CoDeSysSymbolTable>\n")
+        return "".join(lines)
+
+
+def _element(builder: ProjectBuilder, device_type: str, i: int) -> dict[str, Any]:
+    if device_type == "ON_OFF_LIGHT":
+        return {
+            "device_name": f"Light {i}", "device_id": f"Light_{i}", "device_type": device_type,
+            "u_state_addr": builder.io_var(f".OUT_L_{i}"),
+            "change_addr": builder.prg_var(f"PLC_PRG.LIGHT_{i}.external", "BOOL"),
+            "change_type": "value",
+        }
+    if device_type == "BLIND":
+        return {
+            "device_name": f"Blind {i}", "device_id": f"Blind_{i}", "device_type": device_type,
+            "u_is_opening_addr": builder.io_var(f".OUT_B_{i}_UP"),
+            "u_is_closing_addr": builder.io_var(f".OUT_B_{i}_DN"),
+            "u_position_addr": builder.prg_var(f"PLC_PRG.Control_B_{i}.POS", "BYTE"),
+            "open_addr": builder.prg_var(f"PLC_PRG.VIS_B_{i}_UP", "BOOL"),
+            "close_addr": builder.prg_var(f"PLC_PRG.VIS_B_{i}_DOWN", "BOOL"),
+            "go_to_pos_addr": builder.prg_var(f"PLC_PRG.VIS_B_{i}_SHADE", "BOOL"),
+            "set_pos_addr": builder.prg_var(f"PLC_PRG.Input_B_{i}.PI", "BYTE"),
+        }
+    if device_type == "TEMPERATURE_SENSOR":
+        return {
+            "device_name": f"Temperature {i}", "device_id": f"TEMP_{i}", "device_type": device_type,
+            "u_data_addr": builder.prg_var(f"SensorReader.T_{i}", "INT"), "divisor": 10,
+        }
+    if device_type == "TEMPERATURE_SETTER":
+        return {
+            "device_name": f"Target Temperature {i}", "device_id": f"TEMP_SET_{i}", "device_type": device_type,
+            "u_data_addr": builder.prg_var(f"PLC_PRG.TEMP_SET_{i}", "INT"), "divisor": 10,
+            "coordinator_name": "settings",
+        }
+    if device_type == "MOVEMENT_SENSOR":
+        return {
+            "device_name": f"Movement {i}", "device_id": f"MOVE_{i}", "device_type": device_type,
+            "u_data_addr": builder.prg_var(f"PLC_PRG.MOVE_{i}", "BOOL"),
+        }
+    return {
+        "device_name": f"Switch {i}", "device_id": f"SWITCH_{i}", "device_type": device_type,
+        "u_data_addr": builder.prg_var(f"PLC_PRG.SWITCH_{i}", "BOOL"),
+    }
+
+
+def build_project(element_count: int, extra_vars: int = 0, seed: int = 1) -> tuple[str, list[dict[str, Any]]]:
+    """Return (SYM_XML content, elements) of a project with the given number of elements.
+
+    'extra_vars' adds variables not used by any element, to grow the symbol table.
+    """
+    rng = random.Random(seed)
+    builder = ProjectBuilder()
+    types = [device_type for device_type, _ in DEVICE_MIX]
+    weights = [share for _, share in DEVICE_MIX]
+
+    elements = [_element(builder, rng.choices(types, weights)[0], i) for i in range(element_count)]
+    for i in range(extra_vars):
+        builder.prg_var(f"PLC_PRG.Internal_{i // 16}.var_{i % 16}", rng.choice(["BOOL", "INT", "TIME", "WORD"]))
+
+    return builder.to_xml(), elements
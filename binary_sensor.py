@@ -4,11 +4,12 @@ import logging
 from typing import Any
 
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import CONF_ELEMENTS, DEFAULT_COORDINATOR
+from .const import CONF_ELEMENTS
 from .coordinator import IntegrationCoordinator
 
 from .generic_device import PLC_device
@@ -25,16 +26,24 @@ DEVICE_TYPE_TO_CLASS = {
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     full_elements = config_entry.options.get(CONF_ELEMENTS, [])
 
-    entities = [
+    entities = _entities_for(config_entry, full_elements)
+
+    # elements added or changed later are set up without reloading (see hot_reload.py)
+    config_entry.runtime_data.add_platform(Platform.BINARY_SENSOR, _entities_for, async_add_entities)
+    async_add_entities(entities)
+
+
+def _entities_for(config_entry: ConfigEntry, elements: list[dict[str, Any]]) -> list[PLC_device]:
+    """Create the entities of the given elements handled by this platform."""
+    return [
       BinarySensor(
-          config_entry.runtime_data.coordinators[elem.get("coordinator_name", DEFAULT_COORDINATOR)], 
+          config_entry.runtime_data.coordinator_for(elem), 
           elem
       )
-      for elem in full_elements
+      for elem in elements
       if elem.get("device_type") in DEVICE_TYPE_TO_CLASS
     ]
 
-    async_add_entities(entities)
 
 class BinarySensor(PLC_device, BinarySensorEntity):
     # Implementation of a binary sensor.
@@ -49,7 +58,7 @@ class BinarySensor(PLC_device, BinarySensorEntity):
     @property
     def is_on(self) -> bool | None:
         """Return true if the binary sensor is on."""
-        value = self._device.get("u_data_value")
+        value = self._value(self._data_slot)
         if value is None:
             return None
         try:
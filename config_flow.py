@@ -31,11 +31,14 @@ from homeassistant.config_entries import (
     FlowResult, 
 )
 
-import homeassistant.helpers.device_registry as dr
 
 # TODO - validate which imports are necessary!
 
 from .const import DEFAULT_SCAN_INTERVAL, DOMAIN, MIN_SCAN_INTERVAL, CONF_SYM_FILE, CONF_ELEMENTS, CONF_ELEMENTS_ACTION_MODE, CONF_SETTINGS_GROUP_NAME
+from .const import CONF_READ_CHUNK_SIZE, CONF_READ_CONCURRENCY, DEFAULT_READ_CHUNK_SIZE, DEFAULT_READ_CONCURRENCY
+from .const import CONF_REFRESH_SETTLE, DEFAULT_REFRESH_SETTLE, CONF_POLL_INTERVAL
+from .const import CONF_MOTION_POLL_INTERVAL, DEFAULT_MOTION_POLL_INTERVAL
+from .const import CONF_PROFILING, CONF_PROFILE_THRESHOLD, DEFAULT_PROFILE_THRESHOLD
 #from .const import DEFAULT_WRITE_DEBOUNCE, CONF_WRITE_DEBOUNCE
 
 #imports for file uploads
@@ -47,9 +50,13 @@ import xml.etree.ElementTree as ET  #  for XML parsing
 
 import yaml #for elements handling
 
+from .read_plan import without_values
+from .symbol_index import SymbolFileError, SymbolIndex, file_hash, remap_elements, remove_index, resolve_elements
+
 # for testing PLC availability
 import aiohttp
 import asyncio
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -66,21 +73,69 @@ async def validate_host_input(hass: HomeAssistant, data: dict[str, Any]) -> str:
     host = data[CONF_HOST]
     url = f"http://{host}/PLC/webvisu.htm" 
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, timeout=5) as response:
-                if response.status != 200:
-                    _LOGGER.error(f"Unexpected status: {response.status}")
-                    raise CannotConnect(f"Unexpected status: {response.status}")
-        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
-            _LOGGER.error(f"Connection error to {host}: {err}")
-            raise CannotConnect(f"Cannot connect to host: {err}") from err
-        except Exception as err:  # Catch-all for unexpected issues
-            _LOGGER.exception("Unexpected error during host validation")
-            raise CannotConnect("Unexpected error during validation") from err
+    # a one-off check - HA's shared session instead of a new one per attempt
+    session = async_get_clientsession(hass)
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status != 200:
+                _LOGGER.error(f"Unexpected status: {response.status}")
+                raise CannotConnect(f"Unexpected status: {response.status}")
+    except CannotConnect:
+        raise
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        _LOGGER.error(f"Connection error to {host}: {err}")
+        raise CannotConnect(f"Cannot connect to host: {err}") from err
+    except Exception as err:  # Catch-all for unexpected issues
+        _LOGGER.exception("Unexpected error during host validation")
+        raise CannotConnect("Unexpected error during validation") from err
     
     return host
 
+
+MAX_SHOWN_ERRORS = 5  # errors listed in the form, the rest are counted
+
+
+def validate_elements(data: list[dict[str, Any]], other_ids: set[Any], existing_ids: set[Any] = frozenset()) -> list[str]:
+    """Check the attributes of all elements; return every problem found (an empty list if none).
+
+    'other_ids' are the device_ids of the other controllers, 'existing_ids' those of this
+    controller's elements which are kept (when adding elements).
+    """
+    problems: list[str] = []
+    seen: set[Any] = set()
+    for element in data:
+        element_id = element.get("device_id", "Unknown element")  # Safe access for dynamic errors
+
+        if not "device_id" in element:
+            problems.append("Device_id of one of the elements is missing")
+        elif element_id in other_ids:
+            # devices are identified by their device_id, so it must be unique across all controllers
+            problems.append(f"Device_id {element_id} is already used by another PLC")
+        elif element_id in existing_ids:
+            problems.append(f"Device_id {element_id} is already used by a device of this PLC")
+        elif "entity_name" not in element:
+            # settings entities ('entity_name') share the device_id of their device
+            if element_id in seen:
+                problems.append(f"Device_id {element_id} is used by more than one element")
+            seen.add(element_id)
+
+        if not "device_type" in element:
+            problems.append(f"Attribute device_type for {element_id} is missing")
+
+        poll_interval = element.get(CONF_POLL_INTERVAL)
+        if poll_interval is not None and (isinstance(poll_interval, bool) or not isinstance(poll_interval, (int, float)) or poll_interval <= 0):
+            problems.append(f"Attribute poll_interval for {element_id} must be a positive number of seconds")
+    return problems
+
+
+def format_errors(problems: list[str]) -> str:
+    """Join the problems found into one message for the form."""
+    message = "; ".join(problems[:MAX_SHOWN_ERRORS])
+    if len(problems) > MAX_SHOWN_ERRORS:
+        message += f" (and {len(problems) - MAX_SHOWN_ERRORS} more errors)"
+    return message
+
+
 class ExampleConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Integration."""
 
@@ -212,84 +267,6 @@ class OptionsFlowHandler(OptionsFlow):
             menu_options=menu_options,
         )
     
-    # Function checking if addresses provided by the user are in the sym_file and returning webvisu address form
-    #
-    # So if addr would be for example "PLC_PRG.Control_B_1PP2.T_UP"
-    #
-    # xml_vars would be a dictionary build of symbol file generated by codesys with a definition for example
-    # "<Var Type="4" Flags="1073741825" Access="98" RefId="3" Offset="5644" TopLevelType="57">PLC_PRG.Control_B_1PP2.T_UP</Var>"
-    #
-    # xml_types is a dictionary build of type definitions from the symbol file, for example: 
-    # "<TypeSimple TypeId="4" Size="4">TIME</TypeSimple>"
-    #
-    # and as a result, the function returns an addressed to be used in communication with the PLC via webvisu:
-    # RefId=3, Offset=5644, size=4, type=7 (size and type from the DATA_TYPES, as defined by "TIME")
-    # "3|5644|4|7"
-
-    async def _check_addr_in_xml(
-        self,
-        addr: str,
-        xml_vars: dict[str, dict[str, str]],
-        xml_types: dict[str, str],
-        ) -> dict[str, Any]:
-
-        # --------------------------------------------------------------------
-        # Mapping of PLC data types → visu_type / visu_size
-        # --------------------------------------------------------------------
-        DATA_TYPES = {
-            "BOOL": {"visu_type": 0, "visu_size": 1},
-            "INT": {"visu_type": 1, "visu_size": 2},
-            "WORD": {"visu_type": 1, "visu_size": 2},
-            "BYTE": {"visu_type": 2, "visu_size": 1},
-            "DINT": {"visu_type": 4, "visu_size": 4},
-            "DWORD": {"visu_type": 5, "visu_size": 4},
-            "REAL": {"visu_type" : 6, "visu_size": 4},
-            "TIME": {"visu_type": 7, "visu_size": 4},
-            "SINT": {"visu_type": 14, "visu_size": 1},
-            "USINT": {"visu_type": 15, "visu_size": 1},
-            "UINT": {"visu_type": 16, "visu_size": 2},
-            "UDINT": {"visu_type": 17, "visu_size": 4},
-            "DT": {"visu_type": 20, "visu_size": 4},
-        }
-
-        if addr not in xml_vars:
-            #_LOGGER.debug(f"xml_vars: {str(xml_vars)}")
-            return {"error" : f"Address '{addr}' not found in symbol file."}
-        
-        attrib = xml_vars[addr] #copy attributes of variable found in SYM_XML
-        var_type = attrib.get('Type') #for example 102
-
-        if var_type not in xml_types:
-            return {"error" : f"Var type '{var_type}' not defined in symbol file."}
-        
-        var_type_name = xml_types[var_type] #for example Bool
-        _LOGGER.debug(f"Found variable type: {var_type_name}")
-        
-        if var_type_name not in DATA_TYPES:
-            return {"error" :  f"Var type '{var_type_name}' for not defined in data conversion table."}
-        
-        visu_type = DATA_TYPES[var_type_name].get("visu_type")
-
-        if var_type_name == "BOOL":
-            if attrib.get('RefId') in ['1', '2']:
-                visu_size = 0
-            else:
-                visu_size = 1
-        else: 
-            visu_size = DATA_TYPES[var_type_name].get("visu_size")
-
-        _LOGGER.debug(f"Visu_type: {visu_type}")
-        _LOGGER.debug(f"Visu_size: {visu_size}")
-
-        return {"addr" : f"{attrib.get('RefId', '')}|{attrib.get('Offset', '')}|{visu_size}|{visu_type}"}
-    
-    async def _async_remove_existing_devices(self) -> None:
-        """Remove all existing devices and their entities tied to this config entry."""
-        device_registry = dr.async_get(self.hass)
-
-        _LOGGER.debug(f"Clearing all devices for config entry {self.config_entry.entry_id}")
-        device_registry.async_clear_config_entry(self.config_entry.entry_id)
-    
     # function used by the async_step_elements
     # convert setting_... attributes into separate entities  
     async def _async_create_entities_for_blinds(self, data) -> None:
@@ -365,6 +342,8 @@ class OptionsFlowHandler(OptionsFlow):
         """Handle menu refresh flow."""
         if user_input is not None:
             options = self.config_entry.options | user_input
+            # values read from the PLC are not part of the configuration
+            options[CONF_ELEMENTS] = [without_values(elem) for elem in options.get(CONF_ELEMENTS, [])]
             return self.async_create_entry(data=options)
 
         data_schema = vol.Schema(
@@ -373,6 +352,34 @@ class OptionsFlowHandler(OptionsFlow):
                     CONF_SCAN_INTERVAL,
                     default=self.config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
                 ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                # large address lists are split into several requests to the PLC
+                vol.Optional(
+                    CONF_READ_CHUNK_SIZE,
+                    default=self.config_entry.options.get(CONF_READ_CHUNK_SIZE, DEFAULT_READ_CHUNK_SIZE),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=1))),
+                vol.Optional(
+                    CONF_READ_CONCURRENCY,
+                    default=self.config_entry.options.get(CONF_READ_CONCURRENCY, DEFAULT_READ_CONCURRENCY),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=1, max=8))),
+                # refreshes requested after writes within this delay are merged into one poll
+                vol.Optional(
+                    CONF_REFRESH_SETTLE,
+                    default=self.config_entry.options.get(CONF_REFRESH_SETTLE, DEFAULT_REFRESH_SETTLE),
+                ): (vol.All(vol.Coerce(float), vol.Clamp(min=0, max=10))),
+                # moving covers are polled at this rate until they stop (0 = off)
+                vol.Optional(
+                    CONF_MOTION_POLL_INTERVAL,
+                    default=self.config_entry.options.get(CONF_MOTION_POLL_INTERVAL, DEFAULT_MOTION_POLL_INTERVAL),
+                ): (vol.All(vol.Coerce(float), vol.Clamp(min=0, max=10))),
+                # trace polls slower than the threshold (ms) to a file, for finding out why they are slow
+                vol.Optional(
+                    CONF_PROFILING,
+                    default=self.config_entry.options.get(CONF_PROFILING, False),
+                ): bool,
+                vol.Optional(
+                    CONF_PROFILE_THRESHOLD,
+                    default=self.config_entry.options.get(CONF_PROFILE_THRESHOLD, DEFAULT_PROFILE_THRESHOLD),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=0))),
             }
         )
 
@@ -415,25 +422,18 @@ class OptionsFlowHandler(OptionsFlow):
                 errors["base"] = "invalid_file"  
             elif not file_data.strip(): # Check if non-empty
                 errors["base"] = "empty_string"   
-            elif len(file_data.encode('utf-8')) > 2_000_000:  # Limit to 2MB
-                errors["base"] = "file_too_large"
 
-            # Parse XML
-            try:
-                root = ET.fromstring(file_data)
-                # Structural validation
-                if root.tag != "CoDeSysSymbolTable":
-                    errors["base"] = "CoDeSysSymbolTable_missing"
-                elif root.find("SymbolVarList") is None:
-                    errors["base"] = "SymbolVarList_missing"
-                else:
-                    # Optional: Check at least one <Var> with required attributes
-                    var_elements = root.findall("SymbolVarList/Var")
-                    if not var_elements:
-                        errors["base"] = "Var_missing"
-            except ET.ParseError as e:
-                _LOGGER.error(f"XML parsing failed: {e}")
-                errors["base"] = "xml_parser_error"
+            # Parse XML - streamed in the executor, so there is no size limit and
+            # the index is built in the same pass (stored next to the file below)
+            if not errors:
+                try:
+                    index = await self.hass.async_add_executor_job(SymbolIndex.from_string, file_data)
+                except SymbolFileError as e:
+                    # Structural validation
+                    errors["base"] = e.reason
+                except ET.ParseError as e:
+                    _LOGGER.error(f"XML parsing failed: {e}")
+                    errors["base"] = "xml_parser_error"
 
 
             if not errors:
@@ -455,61 +455,51 @@ class OptionsFlowHandler(OptionsFlow):
                     _LOGGER.error(f"Failed to write sym_file: {e}")
                     errors["base"] = "write_failed"
                 else:
-                    # Delete old file if exists
+                    try:
+                        await self.hass.async_add_executor_job(index.save, file_path, file_hash(file_data.encode("utf-8")))
+                    except OSError as e:
+                        # not fatal - the index is rebuilt from the file when needed
+                        _LOGGER.warning(f"Failed to store the symbol index: {e}")
+
+                    # Delete old file (and its index) if exists
                     old_file = self.config_entry.options.get(CONF_SYM_FILE)
                     if old_file and os.path.exists(old_file):
                         await self.hass.async_add_executor_job(os.remove, old_file)
+                    if old_file:
+                        await self.hass.async_add_executor_job(remove_index, old_file)
                     
-                    # Update config_entry.data with the new file path
-                    new_data = {**self.config_entry.options, CONF_SYM_FILE: file_path}
-                    self.hass.config_entries.async_update_entry(self.config_entry, options=new_data)
-
                     # THIS IS USED ONLY WHEN THE SYM FILE IS RELOADED 
-                    # Update the addresses of existing devices (if any are configured)
-                    current_elements: list[dict] = self.config_entry.options.get(CONF_ELEMENTS, [])
+                    # Update the addresses of existing devices (if any are configured) - on copies,
+                    # so the integration sees which devices changed (see hot_reload.py)
+                    # (values read from the PLC are not part of the configuration)
+                    current_elements: list[dict] = [without_values(elem) for elem in self.config_entry.options.get(CONF_ELEMENTS, [])]
                     
                     if current_elements:
                         _LOGGER.info("SYM file updated, re-mapping %d existing elements", len(current_elements))
 
-                        var_types = root.findall("SymbolTypeList/TypeSimple") #all variable types used in SYM_XML
-                        xml_types = {var.attrib["TypeId"]: var.text for var in var_types if var.text} # [0 : "BOOL", 3 : "BYTE...
-
-                        var_elements = root.findall("SymbolVarList/Var") #all variables in SYM_XML
-                        xml_vars = {var.text: var.attrib for var in var_elements if var.text}
-
-                        error_count = 0
-                        error_elements = ''
-                        for element in current_elements:
-                            addr_keys = [k for k in element.keys() if k.endswith("_addr")]
-                            for addr_key in addr_keys:
-                                addr = element[addr_key]
-                                addr_check = await self._check_addr_in_xml(addr, xml_vars, xml_types)
-                              
-                                if "error" in addr_check:
-                                    error_elements += (f"Device - {element.get("device_id", "Unknown")}: " + addr_check["error"] + "\n\n")
-                                    error_count += 1
-                                    if addr_key + "_plc" in element:
-                                      # this will delete addreses for both read and write actions
-                                      # -> deleted read addresses will not be used by coordinators in refresh rounds => safe
-                                      # -> deleted write addresses pose a risk for device-related actions => must be validated at device level
-                                      del element[addr_key + "_plc"]
-                                else:
-                                    element[addr_key + "_plc"] = addr_check["addr"] # refresh the PLC address
-
-                        # NOTE: We mutate config_entry.options in-place via reference.
-                        # No async_update_entry() needed — changes are immediately effective.
-
-                        #elements = {**self.config_entry.options, CONF_ELEMENTS: current_elements}
-                        #self.hass.config_entries.async_update_entry(self.config_entry, options=elements)
-                        if error_count:
-                          _LOGGER.error(f"Encountered {error_count} errors while re-mapping elements to new SYM file:\n {error_elements}")
-                          
+                        # resolved in the executor, applied here on the event loop
+                        updates, remap_errors = await self.hass.async_add_executor_job(remap_elements, current_elements, index)
+                        for position, plc_key, plc_addr in updates:
+                            if plc_addr is None:
+                                # this will delete addreses for both read and write actions
+                                # -> deleted read addresses will not be used by coordinators in refresh rounds => safe
+                                # -> deleted write addresses pose a risk for device-related actions => must be validated at device level
+                                del current_elements[position][plc_key]
+                            else:
+                                current_elements[position][plc_key] = plc_addr # refresh the PLC address
+
+                        # The update below stores them together with the new file path.
+                        if remap_errors:
+                          _LOGGER.error(f"Encountered {len(remap_errors)} errors while re-mapping elements to new SYM file:\n " + "\n\n".join(remap_errors))
 
                     # If no existing elements yet - just proceed normally
                     else:
                         _LOGGER.info("SYM file uploaded successfully. No existing elements to re-map.")
-                    
-                    
+
+                    # Update config_entry.data with the new file path
+                    new_data = {**self.config_entry.options, CONF_ELEMENTS: current_elements, CONF_SYM_FILE: file_path}
+                    self.hass.config_entries.async_update_entry(self.config_entry, options=new_data)
+
                     return self.async_create_entry(data=new_data)
         
         # Show the form on initial load (when user_input is None) - This was missing or indented wrong
@@ -559,98 +549,64 @@ class OptionsFlowHandler(OptionsFlow):
 
                     if not isinstance(data, list):
                         errors["base"] = "elements_not_list"
-                    else:
-                        for element in data:
-                            if not isinstance(element, dict):
-                                errors["base"] = "invalid_element_structure"
-                                break
-                            element_id = element.get("device_id", "Unknown element")  # Safe access for dynamic errors
-
-                            if not "device_id" in element:
-                                errors["base"] = f"Device_id of one of the elements is missing"
-                                break
-                            
-                            if not "device_type" in element:
-                                errors["base"] = f"Attribute device_type for {element_id} is missing"
-                                break
+                    elif not all(isinstance(element, dict) for element in data):
+                        errors["base"] = "invalid_element_structure"
 
                 except yaml.YAMLError as e:
                     _LOGGER.error(f"YAML parsing failed: {e}")
                     errors["base"] = "invalid_yaml"
-            
-                
-            #  For various devices, their attributes should be used to create new entities of the same device.
-            if not errors:
-                await self._async_create_entities_for_blinds(data)
-                await self._async_create_entities_for_lights(data)
 
-            # Now check, if:
+            if not errors and not CONF_SYM_FILE in self.config_entry.options:
+                errors["base"] = "SYM file not available... It is impossible to assign PLC addresses"
+
+            # All elements are checked in one pass and every problem is reported at once:
+            # -- the attributes of the elements
             # -- the provided element has an u_* address (at least one to update values)
             # -- the the provided addressess (like .OUT1 or PLC_PRG.XYZ) are found in the provided SYM file data)
-            
-            if not CONF_SYM_FILE in self.config_entry.options:
-                errors["base"] = "SYM file not available... It is impossible to assign PLC addresses"
-                
             if not errors:
+                other_ids = {
+                    elem.get("device_id")
+                    for entry in self.hass.config_entries.async_entries(DOMAIN)
+                    if entry.entry_id != self.config_entry.entry_id
+                    for elem in entry.options.get(CONF_ELEMENTS, [])
+                }
+                existing_ids = set()
+                if action_mode == "add":
+                    existing_ids = {elem.get("device_id") for elem in self.config_entry.options.get(CONF_ELEMENTS, [])}
+                problems = validate_elements(data, other_ids, existing_ids)
+
+                #  For various devices, their attributes should be used to create new entities of the same device.
+                await self._async_create_entities_for_blinds(data)
+                await self._async_create_entities_for_lights(data)
+
                 try:
                     sym_file_path = self.config_entry.options[CONF_SYM_FILE]
-                    async with aiofiles.open(sym_file_path, "r", encoding="iso-8859-1") as f:
-                        xml_content = await f.read()
-                    try:
-                        root = ET.fromstring(xml_content)
-                        var_types = root.findall("SymbolTypeList/TypeSimple") #all variable types used in SYM_XML
-                        xml_types = {var.attrib["TypeId"]: var.text for var in var_types if var.text} # [0 : "BOOL", 3 : "BYTE...
-                        #_LOGGER.debug("xml-vars: %s", str(xml_types))
-
-                        var_elements = root.findall("SymbolVarList/Var") #all variables in SYM_XML
-                        xml_vars = {var.text: var.attrib for var in var_elements if var.text}
-                        
-                        #example <Var Type="102" Flags="33554464" Access="98" RefId="2" Offset="112">.OUT1</Var>
-
-                        for element in data:
-                            element_id = element.get("device_id", "Unknown")
-
-                            # 1) Check if element has at least 1 attribute starting with "u_"
-                            has_u_attr = any((key.startswith("u_") and key.endswith("_addr")) for key in element)
-                            if not has_u_attr:
-                                errors["base"] = f"Element '{element_id}' must have at least one 'u_XXXX_addr' attribute"
-                                break
-                            # 2) Check all attributes of the element ending with "_addr"
-                            addr_keys = [key for key in element if key.endswith("_addr")]
-
-                            for addr_key in addr_keys:
-                                addr = element[addr_key]
-                                
-                                addr_check = await self._check_addr_in_xml(addr, xml_vars, xml_types)
-                                
-                                if "error" in addr_check:
-                                    errors["base"] = f"Variable: {element_id}: " + addr_check["error"]
-                                    break  # Break inner loop on error
-                                
-                                element[addr_key + "_plc"] = addr_check["addr"] # assign the PLC address to a new attribute
-                    except:
-                        errors["base"] = "XML parsing error"
-                            
-                except (OSError, ET.ParseError) as e:
+                    # the index is parsed once per SYM file and reused (see symbol_index.py)
+                    index = await self.hass.async_add_executor_job(SymbolIndex.load, sym_file_path)
+                    # resolved in the executor, all elements at once (see symbol_index.py)
+                    problems += await self.hass.async_add_executor_job(resolve_elements, data, index)
+                except (OSError, ET.ParseError, SymbolFileError) as e:
                     _LOGGER.error(f"Failed to validate against sym_file: {e}")
                     errors["base"] = "sym_file_validation_failed"
 
+                if problems and not errors:
+                    _LOGGER.debug("Elements rejected, %d errors: %s", len(problems), problems)
+                    errors["base"] = format_errors(problems)
+
             if not errors:
                 _LOGGER.debug("Parsed elements: %s", str(data))
 
                 if action_mode == "replace":
-                    new_elements = data  # Replace fully
-                    await self._async_remove_existing_devices()
+                    new_elements = data  # Replace fully - devices not defined anymore are removed by the integration
                 elif action_mode == "add":
-                    existing_elements = self.config_entry.options.get(CONF_ELEMENTS, [])
-                    new_elements = existing_elements + data  # Append (duplicates already caught above)
+                    new_elements = self.config_entry.options.get(CONF_ELEMENTS, []) + data  # Append (device_ids already used were rejected above)
                 else:
                     errors["base"] = "invalid_action_mode"
 
                 if not errors:
 
-                  # Store in options
-                  elements = {**self.config_entry.options, CONF_ELEMENTS: new_elements}
+                  # Store in options - values read from the PLC are not part of the configuration
+                  elements = {**self.config_entry.options, CONF_ELEMENTS: [without_values(elem) for elem in new_elements]}
                   self.hass.config_entries.async_update_entry(self.config_entry, options=elements)
                   return self.async_create_entry(data = elements)
             
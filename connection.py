@@ -0,0 +1,170 @@
+# Connection health of a PLC - a circuit breaker in front of wago_visu_client.WagoPLC
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+import aiohttp
+
+from wago_visu_client import WagoPLC as API
+from wago_visu_client import ConnectionError as APIConnectionError
+
+from .const import CIRCUIT_BACKOFF_MAX, CIRCUIT_BACKOFF_MIN, CIRCUIT_FAILURE_THRESHOLD, PROBE_TIMEOUT
+from .const import CONNECT_TIMEOUT, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT, REQUEST_TIMEOUT
+from .write_queue import set_data_multi
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+STATE_CLOSED = "closed"        # PLC answers - requests go through
+STATE_OPEN = "open"            # PLC is down - requests fail at once until the retry time
+STATE_HALF_OPEN = "half_open"  # a probe checks whether the PLC is back
+
+
+def create_session(connections: int) -> aiohttp.ClientSession:
+    """Create the session used for one PLC.
+
+    The webserver of the 750 CPU handles only a few connections, so they are limited
+    to 'connections' and kept alive between polls instead of being reopened for every
+    request, and the session is not shared with the traffic of other integrations.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=connections,
+        limit_per_host=connections,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+class CircuitOpenError(APIConnectionError):
+    """Error to indicate a request was not sent, because the PLC is not reachable."""
+
+
+class PLCConnection:
+    """Shared per-host access to the PLC, tracking its health.
+
+    After CIRCUIT_FAILURE_THRESHOLD consecutive failed requests the circuit opens:
+    reads and writes fail immediately with CircuitOpenError instead of each waiting
+    for the full HTTP timeout. The first request after the retry time triggers a
+    cheap probe (GET of the visu page) - if the PLC answers the circuit closes,
+    otherwise the retry time is doubled, up to CIRCUIT_BACKOFF_MAX seconds.
+    The PollScheduler does not poll before 'retry_at' while the circuit is open.
+    """
+
+    def __init__(self, api: API) -> None:
+        self.api = api
+        self.state = STATE_CLOSED
+        self.retry_at = 0.0       # loop time after which the next probe is allowed
+        self._backoff = 0.0
+        self._failures = 0        # consecutive failures
+        self._probe_lock = asyncio.Lock()
+
+        self.opened = 0           # times the circuit opened
+        self.rejected = 0         # requests failed fast while open
+        self.total_failures = 0
+
+    @property
+    def host(self) -> str:
+        return self.api.host
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self.api.session
+
+    @property
+    def available(self) -> bool:
+        return self.state == STATE_CLOSED
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    # --------------------------------------------------------------------
+    # Requests
+    # --------------------------------------------------------------------
+
+    async def get_data(self, addrs: list[str]) -> list[str]:
+        return await self._request(lambda: self.api.get_data(addrs))
+
+    async def set_data(self, address: str, value: Any) -> bool:
+        return await self._request(lambda: self.api.set_data(address, value))
+
+    async def set_data_multi(self, writes: list[tuple[str, str]]) -> None:
+        return await self._request(lambda: set_data_multi(self.api, writes))
+
+    async def _request(self, request: Callable[[], Awaitable[_T]]) -> _T:
+        if self.state != STATE_CLOSED:
+            await self._async_check_recovered()
+
+        try:
+            result = await request()
+        except APIConnectionError as err:
+            self._record_failure(err)
+            raise
+        self._failures = 0
+        return result
+
+    # --------------------------------------------------------------------
+    # Circuit state
+    # --------------------------------------------------------------------
+
+    def _record_failure(self, err: Exception) -> None:
+        self._failures += 1
+        self.total_failures += 1
+        if self.state == STATE_CLOSED and self._failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self._open(CIRCUIT_BACKOFF_MIN)
+            _LOGGER.warning("PLC %s not reachable (%s) - pausing requests for %d s", self.host, err, self._backoff)
+
+    def _open(self, backoff: float) -> None:
+        self._backoff = min(backoff, CIRCUIT_BACKOFF_MAX)
+        self.retry_at = self._now() + self._backoff
+        if self.state == STATE_CLOSED:
+            self.opened += 1
+        self.state = STATE_OPEN
+
+    def _close(self) -> None:
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._backoff = 0.0
+
+    async def _async_check_recovered(self) -> None:
+        """Fail fast while open; after the retry time let one probe decide.
+
+        Requests arriving while another one is probing wait for the probe and go
+        ahead only if it closed the circuit, so the chunks of one read either all
+        reach the PLC or all fail.
+        """
+        if self.state == STATE_OPEN and self._now() < self.retry_at:
+            self.rejected += 1
+            raise CircuitOpenError(f"PLC {self.host} not reachable, retrying in {self.retry_at - self._now():.0f} s")
+
+        async with self._probe_lock:
+            if self.state == STATE_CLOSED:
+                # closed by the probe of another request
+                return
+            if self.state == STATE_OPEN and self._now() < self.retry_at:
+                # the probe of another request failed
+                self.rejected += 1
+                raise CircuitOpenError(f"PLC {self.host} not reachable")
+            self.state = STATE_HALF_OPEN
+            if await self._async_probe():
+                _LOGGER.info("PLC %s is reachable again", self.host)
+                self._close()
+                return
+            self._open(self._backoff * 2)
+            _LOGGER.debug("PLC %s still not reachable - next probe in %d s", self.host, self._backoff)
+            self.rejected += 1
+            raise CircuitOpenError(f"PLC {self.host} not reachable")
+
+    async def _async_probe(self) -> bool:
+        """Check with a cheap request whether the webvisu answers."""
+        url = f"http://{self.host}/PLC/webvisu.htm"
+        try:
+            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT)) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
@@ -6,6 +6,36 @@ DEFAULT_WRITE_DEBOUNCE = 1
 
 DEFAULT_SETTINGS_INTERVAL = 60*60*24
 
+DEFAULT_READ_CHUNK_SIZE = 50   # addresses per webvisu read request
+DEFAULT_READ_CONCURRENCY = 2   # read requests in flight at the same time
+
+DEFAULT_WRITE_WINDOW = 0.05    # seconds to collect writes before sending them in one request
+DEFAULT_WRITE_BATCH_SIZE = 20  # addresses per webvisu write request
+DEFAULT_REFRESH_SETTLE = 0.3   # seconds to wait after a write before polling, merging requests made meanwhile
+
+MIN_POLL_INTERVAL = 0.2        # shortest poll_interval of an element, in seconds
+POLL_MERGE_RATIO = 0.25        # groups due within this share of their interval are read together with the due ones
+POLL_RETRY_INTERVAL = 30       # seconds before a failed poll of a slow group is retried
+VALUE_CACHE_SAVE_DELAY = 60    # seconds between writes of the last known values to storage
+
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive failed requests after which the PLC is considered down
+CIRCUIT_BACKOFF_MIN = 5        # seconds before the first probe of a PLC considered down
+CIRCUIT_BACKOFF_MAX = 300      # longest pause between probes, in seconds
+PROBE_TIMEOUT = 3              # seconds to wait for the probe request
+
+REQUEST_TIMEOUT = 10           # seconds for a whole request to the PLC
+CONNECT_TIMEOUT = 5            # seconds to open a connection to the PLC
+KEEPALIVE_TIMEOUT = 30         # seconds an idle connection to the PLC is kept open
+DNS_CACHE_TTL = 3600           # seconds a resolved PLC host name is cached
+
+DEFAULT_MOTION_POLL_INTERVAL = 0.5  # seconds between polls of moving covers (0 = no fast polling)
+MOTION_HOLD = 5                     # seconds of fast polling after a move command, before motion is reported
+
+DEFAULT_PROFILE_THRESHOLD = 500     # polls taking longer (ms) are written to the trace file when profiling
+PROFILE_TRACE_MAX_BYTES = 1_000_000 # size of the trace file before it is rotated
+PROFILE_TRACE_BACKUPS = 3           # rotated trace files kept
+PROFILE_SLOWEST_LISTENERS = 10      # slowest entity updates kept per traced poll
+
 DEFAULT_COORDINATOR = "live"
 
 CONF_SYM_FILE = "sym_file"
@@ -14,4 +44,11 @@ CONF_ELEMENTS_ACTION_MODE = "elements_action_mode"
 CONF_WRITE_DEBOUNCE = "write_debounce"
 CONF_SETTINGS_GROUP_NAME = "settings"
 CONF_SETTINGS_INTERVAL = "settings_interval"
+CONF_READ_CHUNK_SIZE = "read_chunk_size"
+CONF_READ_CONCURRENCY = "read_concurrency"
+CONF_REFRESH_SETTLE = "refresh_settle"
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_MOTION_POLL_INTERVAL = "motion_poll_interval"
+CONF_PROFILING = "profiling"
+CONF_PROFILE_THRESHOLD = "profile_threshold"
 
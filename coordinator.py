@@ -1,23 +1,96 @@
-from datetime import timedelta
+import asyncio
 import logging
+import time
+from collections.abc import Callable, Iterable
 from typing import Any, List
 
 import aiohttp
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST
-from homeassistant.core import DOMAIN, HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, DOMAIN, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from wago_visu_client import WagoPLC as API
 from wago_visu_client import ConnectionError as APIConnectionError
 
 #from .api import API, APIConnectionError
 
-from .const import  CONF_ELEMENTS, DEFAULT_COORDINATOR
+from .batch_reader import BatchReader
+from .const import  CONF_ELEMENTS
+from .const import CONF_REFRESH_SETTLE, DEFAULT_REFRESH_SETTLE, MOTION_HOLD
+from .device_index import DeviceIndex
+from .profiler import PollProfiler, PollTrace
+from .read_plan import ReadPlan, ValueTable
+from .write_queue import WriteQueue
 
 _LOGGER = logging.getLogger(__name__)
 
+
+class RefreshScheduler:
+    """Merge post-write refresh requests of many entities into one poll.
+
+    Every request is due 'settle_delay' seconds (or the requested delay, if longer)
+    after it was made. Requests arriving before the poll runs move it to the latest
+    due time, so an automation switching a whole floor results in a single poll.
+    Requests naming their devices are served by a partial refresh of just those
+    devices, a request without devices makes it a full refresh.
+    """
+
+    def __init__(self, coordinator: "IntegrationCoordinator", settle_delay: float = DEFAULT_REFRESH_SETTLE) -> None:
+        self._coordinator = coordinator
+        self.settle_delay = settle_delay
+
+        self._handle: asyncio.TimerHandle | None = None
+        self._due = 0.0
+        self._device_ids: set[Any] | None = set()  # None = full refresh
+        self.requests = 0  # refresh requests received
+        self.polls = 0     # polls actually made for them
+
+    @callback
+    def async_schedule(self, delay: float = 0, device_ids: Iterable[Any] | None = None) -> None:
+        """Request a refresh of the devices (or everything) after 'delay' seconds (at least the settle delay)."""
+        loop = self._coordinator.hass.loop
+        due = loop.time() + max(delay, self.settle_delay)
+        self.requests += 1
+
+        if device_ids is None:
+            self._device_ids = None
+        elif self._device_ids is not None:
+            self._device_ids.update(device_ids)
+
+        if self._handle is not None:
+            if due <= self._due:
+                return
+            self._handle.cancel()
+
+        self._due = due
+        self._handle = loop.call_at(due, self._fire)
+
+    @callback
+    def _fire(self) -> None:
+        self._handle = None
+        self.polls += 1
+        device_ids, self._device_ids = self._device_ids, set()
+        _LOGGER.debug("%s coordinator - post-write refresh of %s (%d requests, %d polls)", self._coordinator.group_name, device_ids or "all devices", self.requests, self.polls)
+
+        if device_ids is None:
+            if self._coordinator.poll_scheduler is not None:
+                # read along with any other group due now
+                self._coordinator.poll_scheduler.async_poll_now(self._coordinator.group_name)
+            else:
+                self._coordinator.hass.async_create_task(self._coordinator.async_refresh())
+        else:
+            self._coordinator.hass.async_create_task(self._coordinator.async_refresh_devices(device_ids))
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop a pending refresh."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._device_ids = set()
+
+
 class IntegrationCoordinator(DataUpdateCoordinator[List[dict[str, Any]]]):
 
     data: list[dict[str, Any]]
@@ -26,9 +99,12 @@ class IntegrationCoordinator(DataUpdateCoordinator[List[dict[str, Any]]]):
         self, 
         hass: HomeAssistant, 
         config_entry: ConfigEntry,       # for fetching the configuration data
-        session: aiohttp.ClientSession,  # needed for the API to work in async
+        session: aiohttp.ClientSession,  # the integration's session to the PLC (see connection.py)
         group_name: str,                 # used to identify the coordinator
-        update_interval: timedelta       # update interval in second
+        update_interval: float,          # poll interval in seconds (polls are driven by the PollScheduler)
+        write_queue: WriteQueue,         # shared queue for writes to the PLC
+        reader: BatchReader,             # shared reader (through the PLCConnection), so all groups respect one concurrency limit
+        device_index: DeviceIndex | None = None  # shared device_id lookup of the elements
       ) -> None:
         """Initialize coordinator."""
 
@@ -38,74 +114,271 @@ class IntegrationCoordinator(DataUpdateCoordinator[List[dict[str, Any]]]):
         self.group_name = group_name     
         self.session = session            # Store the async session
         self.poll_interval = update_interval
+        self.write_queue = write_queue
+
+        # long address lists are read in chunks, a few of them at the same time
+        self.reader = reader
 
-        self.api = API(self.host, self.session)        
+        # set by the PollScheduler driving the polls of this group
+        self.poll_scheduler = None
+
+        # Devices in motion (e.g. moving covers) are polled at the fast motion rate by the
+        # PollScheduler: {device_id: loop time until which they stay fast even if not moving}
+        self.active_devices: dict[Any, float] = {}
+        self._activity_checks: dict[Any, Callable[[], bool]] = {}
+
+        # last known values kept across restarts (see value_cache.py); 'stale' is set while the
+        # values restored at startup were not confirmed by a poll yet
+        self.value_cache = None
+        self.stale = False
+
+        # set by the PollScheduler when profiling is on - the trace of the running poll
+        # also times every entity update of the listener fan-out
+        self.profiler: PollProfiler | None = None
+        self._trace: PollTrace | None = None
+        self._own_trace = False  # the trace was started by async_update_data and ends with the fan-out
+
+        # refreshes requested after writes are merged into one poll
+        self.refresh_scheduler = RefreshScheduler(
+            self, config_entry.options.get(CONF_REFRESH_SETTLE, DEFAULT_REFRESH_SETTLE)
+        )
+
+        # elements and entities by device_id, shared by all groups of the entry
+        self.device_index = device_index or DeviceIndex(self.all_elements)
+
+        # values of this group, one slot per PLC address - entities read them by slot
+        self.values = ValueTable()
+
+        # compiled once here and rebuilt only when options change
+        self.read_plan = ReadPlan.compile(self.all_elements, self.group_name, self.values)
+
+        # Change detection - entities register with their device_id as the listener context,
+        # so after a poll only listeners of devices with changed values are called.
+        # None means "notify everyone" (first refresh, availability change, errors...)
+        self._device_listeners: dict[Any, dict[CALLBACK_TYPE, CALLBACK_TYPE]] = {}
+        self._changed_devices: set[Any] | None = None
+        self.suppressed_updates = 0  # number of entity updates skipped because nothing changed
 
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,  # also for groups created outside the setup (see hot_reload.py)
             name=f"{DOMAIN} ({config_entry.unique_id}) - {self.group_name}",
             update_method=self.async_update_data,
-            update_interval=timedelta(seconds=self.poll_interval),
+            update_interval=None,  # the PollScheduler polls all groups together
         )
 
 
 
-    async def async_update_data(self):
-        # get elements grouped by the coordinator_name.  If none configured, reach for the DEFAULT_COORDINATOR
-        elements = [elem for elem in self.all_elements if elem.get("coordinator_name", DEFAULT_COORDINATOR) == self.group_name]
-        #_LOGGER.debug("async_update_data elements of %s : %s", self.group_name, str(elements))
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: Any = None) -> Callable[[], None]:
+        """Listen for data updates and index the listener by its device_id context."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        listeners = self._device_listeners.setdefault(context, {})
+        listeners[remove_listener] = update_callback
+
+        @callback
+        def remove_device_listener() -> None:
+            listeners.pop(remove_listener, None)
+            if not listeners:
+                self._device_listeners.pop(context, None)
+            remove_listener()
+
+        return remove_device_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners of changed devices only (or all if the change set is unknown)."""
+        changed, self._changed_devices = self._changed_devices, None
+        if changed is None:
+            if self._trace is None:
+                super().async_update_listeners()
+            else:
+                for update_callback, context in list(self._listeners.values()):
+                    self._async_call_listener(update_callback, context)
+            self._async_end_own_trace()
+            return
+
+        suppressed = 0
+        for context, listeners in list(self._device_listeners.items()):
+            if context is None or context in changed:
+                for update_callback in list(listeners.values()):
+                    self._async_call_listener(update_callback, context)
+            else:
+                suppressed += len(listeners)
+
+        if suppressed:
+            self.suppressed_updates += suppressed
+            _LOGGER.debug("%s coordinator - %d devices changed, %d entity updates suppressed (total %d)", self.group_name, len(changed), suppressed, self.suppressed_updates)
+        self._async_end_own_trace()
+
+    @callback
+    def _async_call_listener(self, update_callback: CALLBACK_TYPE, context: Any) -> None:
+        if self._trace is None:
+            update_callback()
+            return
+        start = time.perf_counter()
+        update_callback()
+        self._trace.listener(self.group_name, context, (time.perf_counter() - start) * 1000)
+
+    @callback
+    def _async_end_own_trace(self) -> None:
+        """Finish the trace of an async_update_data poll once its listeners were called."""
+        if self._own_trace:
+            self._trace.mark("listeners")
+            self.profiler.finish(self._trace)
+            self._trace = None
+            self._own_trace = False
+
+    async def async_shutdown(self) -> None:
+        """Cancel the scheduled polls."""
+        self.refresh_scheduler.async_cancel()
+        await super().async_shutdown()
+
+    def rebuild_read_plan(self, all_elements: list[dict[str, Any]] | None = None) -> None:
+        """Recompile the read plan, e.g. after the configured elements changed."""
+        if all_elements is not None:
+            self.all_elements = all_elements
+        self.read_plan = ReadPlan.compile(self.all_elements, self.group_name, self.values)
+
+    @callback
+    def async_add_activity_check(self, device_id: Any, is_active: Callable[[], bool]) -> CALLBACK_TYPE:
+        """Register a check telling whether a device is in motion, checked after every poll."""
+        self._activity_checks[device_id] = is_active
+
+        @callback
+        def remove_activity_check() -> None:
+            self._activity_checks.pop(device_id, None)
+            self.active_devices.pop(device_id, None)
+
+        return remove_activity_check
+
+    @callback
+    def async_mark_active(self, device_id: Any, hold: float = MOTION_HOLD) -> None:
+        """Poll a device at the fast motion rate, at least for 'hold' seconds (e.g. after a move command)."""
+        until = self.hass.loop.time() + hold
+        started = device_id not in self.active_devices
+        self.active_devices[device_id] = max(until, self.active_devices.get(device_id, 0))
+        if started and self.poll_scheduler is not None:
+            self.poll_scheduler.async_activity_changed()
+
+    @callback
+    def _async_update_activity(self) -> None:
+        """Start or stop fast polling of devices according to their activity checks."""
+        now = self.hass.loop.time()
+        started = False
+        for device_id, is_active in self._activity_checks.items():
+            if is_active():
+                started = started or device_id not in self.active_devices
+                self.active_devices[device_id] = max(now, self.active_devices.get(device_id, 0))
+            elif self.active_devices.get(device_id, now) < now:
+                # stopped and the hold after a command is over
+                del self.active_devices[device_id]
+
+        for device_id in [d for d, until in self.active_devices.items() if d not in self._activity_checks and until < now]:
+            del self.active_devices[device_id]
+
+        if started and self.poll_scheduler is not None:
+            self.poll_scheduler.async_activity_changed()
+
+    @callback
+    def async_set_poll_result(self, plan: ReadPlan, values: list[Any], trace: PollTrace | None = None) -> None:
+        """Apply values read by the PollScheduler for this group's plan."""
+        previous_update_success = self.last_update_success
+        changed = plan.scatter(values)
+        if trace is not None:
+            trace.mark(f"{self.group_name}.scatter")
+        # after a failed poll all entities must refresh their availability, after
+        # the first poll following a restore they drop the stale mark
+        self._changed_devices = changed if previous_update_success and not self.stale else None
+        self.stale = False
+        self._trace = trace
+        self.async_set_updated_data(self.all_elements)
+        self._trace = None
+        if trace is not None:
+            trace.mark(f"{self.group_name}.listeners")
+        self._async_update_activity()
+        if self.value_cache is not None:
+            self.value_cache.async_polled(self.group_name, changed)
+
+    @callback
+    def async_set_partial_result(self, plan: ReadPlan, values: list[Any], trace: PollTrace | None = None) -> set[Any]:
+        """Apply values of a partial read (some devices only) and notify changed devices."""
+        changed = plan.scatter(values)
+        if trace is not None:
+            trace.mark(f"{self.group_name}.scatter")
+        if changed and self.last_update_success:
+            self._changed_devices = changed
+            self._trace = trace
+            self.async_update_listeners()
+            self._trace = None
+            if trace is not None:
+                trace.mark(f"{self.group_name}.listeners")
+        self._async_update_activity()
+        if changed and self.value_cache is not None:
+            self.value_cache.async_schedule_save()
+        return changed
+
+    @callback
+    def async_set_poll_error(self, err: Exception) -> None:
+        """Mark the group unavailable after a failed PollScheduler read."""
+        self._changed_devices = None
+        self.async_set_update_error(UpdateFailed(f"Error communicating with API: {err}"))
+
+    async def async_refresh_devices(self, device_ids: Iterable[Any] = (), addrs: Iterable[str] = ()) -> None:
+        """Re-read only the given devices and/or PLC addresses of this group.
+
+        The values are updated in place and only the entities of devices whose values
+        changed are notified. Used to confirm writes without polling the whole group.
+        """
+        plan = self.read_plan.subset(device_ids, addrs)
+        if not plan.addrs:
+            return
 
-        if not elements:
-            _LOGGER.debug(f"{self.group_name} coordinator - No elements configured; retriving nothing....")
-            return self.all_elements        
-
-        addrs = []
-        mapping = []  # List of (element_name, sub_key) tuples, parallel to addrs
-        data = {}  # Our return structure: {element_name: {sub_key: value, ...}}
-
-        
-        # Iterate over elements and collect 'u_....' attributes 
-
-        for elem in elements:
-            element_id = elem.get("device_id")
+        try:
+            api_data = await self.reader.read(plan.addrs)
+        except Exception as err:
+            # the next regular poll will pick the values up
+            _LOGGER.warning("%s coordinator - partial refresh of %d addresses failed: %s", self.group_name, len(plan.addrs), err)
+            return
 
-            data[element_id] = {}  # Initialize sub-dict for this element
+        changed = self.async_set_partial_result(plan, api_data)
+        _LOGGER.debug("%s coordinator - partial refresh of %d addresses, changed devices: %s", self.group_name, len(plan.addrs), changed)
 
-            # Iterate over keys to find readable *_addr_plc
+    async def async_update_data(self):
+        # the plan holds the addresses of elements grouped by the coordinator_name (see read_plan.py)
+        plan = self.read_plan
 
-            #update_addresses = [key for key in element if (key.startswith("u_") and key.endswith("_addr_plc"))]
-            #_LOGGER.debug("The 'udpate_addresses': %s", update_addresses)
+        if not plan.elements:
+            _LOGGER.debug(f"{self.group_name} coordinator - No elements configured; retriving nothing....")
+            return self.all_elements
 
-            for key in list(elem.keys()):
-                if key.startswith("u_") and key.endswith("_addr_plc"):
-                    addrs.append(elem[key])
+        if not plan.addrs:
+            _LOGGER.warning(f"{self.group_name} coordinator - No update addresses found; returning empty data")
+            return self.all_elements
 
-                    # Derive sub_key by stripping "_addr_plc"
-                    value_key = key[:-len("_addr_plc")]+ "_value"
-                    mapping.append((elem, value_key))
-            
-        #_LOGGER.debug("The 'mapping': %s", mapping)
+        # notify all listeners unless this poll completes and tells us what changed
+        self._changed_devices = None
+        previous_update_success = self.last_update_success
 
-        if not addrs:
-            _LOGGER.warning(f"{self.group_name} coordinator - No update addresses found; returning empty data")
-            return self.all_elements 
-        
-        #_LOGGER.debug("The 'udpate_addresses': %s", addrs)
+        # the trace ends after the listeners were called (see async_update_listeners)
+        trace = None
+        if self.profiler is not None:
+            trace = self.profiler.start(self.group_name)
+            trace.addresses = len(plan.addrs)
+            trace.mark("build")
 
-        # Step 2: Call API (fixed to be async with session)
+        # Call API and map the values back to the elements
         try:
-            api_data = await self.api.get_data(addrs)
+            # chunks which failed or returned the wrong number of values come back as None
+            api_data = await self.reader.read(plan.addrs)
+            if trace is not None:
+                trace.mark("read")
 
-            if len(api_data) != len(addrs):
-                raise UpdateFailed(f"{self.group_name} coordinator - Response length mismatch: expected {len(addrs)}, got {len(api_data)}")
-
-            # Step 3: Map values back to data structure
-            for i, val in enumerate(api_data):
-                #_LOGGER.debug("Assigning values from API': index: %i, value: %s", i, val)
-                elem, value_key = mapping[i]
-                #_LOGGER.debug("Updated element': device_id: %s, attribute: %s", elem.get("device_id"), value_key)
-                elem[value_key] = val
+            changed = plan.scatter(api_data)
+            if trace is not None:
+                trace.mark("scatter")
+                self._trace, self._own_trace = trace, True
 
         except APIConnectionError as err:
           _LOGGER.error(err)
@@ -113,25 +386,18 @@ class IntegrationCoordinator(DataUpdateCoordinator[List[dict[str, Any]]]):
         except Exception as err:
             raise UpdateFailed(f"Error communicating with API: {err}") from err
 
+        # after a failed poll all entities must refresh their availability
+        if previous_update_success and not self.stale:
+            self._changed_devices = changed
+        self.stale = False
+        if self.value_cache is not None:
+            self.value_cache.async_polled(self.group_name, changed)
+
         # What is returned here is stored in self.data by the DataUpdateCoordinator
-        _LOGGER.debug(f"{self.group_name} coordinator - post update elements: %s", str(elements))
+        _LOGGER.debug("%s coordinator - updated %d addresses", self.group_name, len(plan.addrs))
         return self.all_elements 
         
 
-    # TODO - check if this is needed
-    
-    def get_device(self, device_id: int) -> dict[str, Any]: # IS IT USED?
-        """Get a device entity from our api data."""
-        try:
-            return [
-                devices for devices in self.data if devices["device_id"] == device_id
-            ][0]
-        except (TypeError, IndexError):
-            # In this case if the device id does not exist you will get an IndexError.
-            # If api did not return any data, you will get TypeError.
-            return None
-
-    def get_device_parameter(self, device_id: int, parameter: str) -> Any:
-        """Get the parameter value of one of our devices from our api data."""
-        if device := self.get_device(device_id):
-            return device.get(parameter)
+    def get_device(self, device_id: int) -> dict[str, Any]:
+        """Get the (main) element of a device."""
+        return self.device_index.element(device_id)
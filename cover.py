@@ -2,14 +2,14 @@
 
 import logging
 from typing import Any
-import asyncio
 
 from homeassistant.components.cover import CoverDeviceClass, CoverEntity, CoverEntityFeature
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE, CONF_ELEMENTS, DEFAULT_COORDINATOR
+from .const import CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE, CONF_ELEMENTS
 from .coordinator import IntegrationCoordinator
 
 from .generic_device import PLC_device
@@ -36,15 +36,23 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
 
     full_elements = config_entry.options.get(CONF_ELEMENTS, [])
 
-    entities = [
+    entities = _entities_for(config_entry, full_elements)
+    # elements added or changed later are set up without reloading (see hot_reload.py)
+    config_entry.runtime_data.add_platform(Platform.COVER, _entities_for, async_add_entities)
+    async_add_entities(entities)
+
+
+def _entities_for(config_entry: ConfigEntry, elements: list[dict[str, Any]]) -> list[PLC_device]:
+    """Create the entities of the given elements handled by this platform."""
+    return [
       Cover(
-          config_entry.runtime_data.coordinators[elem.get("coordinator_name", DEFAULT_COORDINATOR)], 
+          config_entry.runtime_data.coordinator_for(elem), 
           elem
       )
-      for elem in full_elements
+      for elem in elements
       if elem.get("device_type") in DEVICE_TYPE_TO_CLASS
     ]
-    async_add_entities(entities)
+
 
 class Cover(PLC_device, CoverEntity):
     # Implementation of a cover.
@@ -54,6 +62,9 @@ class Cover(PLC_device, CoverEntity):
         self._id_suffix = device.get("u_position_addr", "unknown").replace(".", "_")
         self._availability_check = "u_position_value" #overwrite default attribute to check for availability
         super().__init__(coordinator, device)
+        self._position_slot = self._element.slot("u_position_value")
+        self._opening_slot = self._element.slot("u_is_opening_value")
+        self._closing_slot = self._element.slot("u_is_closing_value")
 
         # Set device class based on config (this applies the class-specific behaviors)
         self._attr_device_class = DEVICE_TYPE_TO_CLASS.get(device.get("device_type"))
@@ -69,59 +80,66 @@ class Cover(PLC_device, CoverEntity):
         # Write debounce
         self._write_debounce = coordinator.config_entry.options.get(CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE)
 
-    @property #overwrite property of the PLC_device
-    def available(self) -> bool:
-        return self.coordinator.last_update_success and "u_position_value" in self._device
-    
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # while the cover moves, the coordinator polls it at the fast motion rate
+        self.async_on_remove(
+            self.coordinator.async_add_activity_check(self._device.get("device_id"), self._is_moving)
+        )
+
+    def _is_moving(self) -> bool:
+        return self.is_opening or self.is_closing
+
     @property
     def current_cover_position(self) -> int | None:
-        return 100*int(self._device.get("u_position_value"))/255
+        return 100*int(self._value(self._position_slot))/255
     
     @property
     def is_closed(self) -> bool | None:
-        return self._device.get("u_position_value") == '0'
+        return self._value(self._position_slot) == '0'
     
     @property
     def is_closing(self) -> bool | None:
-        return self._device.get("u_is_closing_value") == '1'
+        return self._value(self._closing_slot) == '1'
     
     @property
     def is_opening(self) -> bool | None:
-        return self._device.get("u_is_opening_value") == '1'
+        return self._value(self._opening_slot) == '1'
 
     async def async_open_cover(self, **kwargs: Any) -> None:
         """Open the cover."""        
-        await self._write("open_addr_plc", 1)
+        await self._write("open_addr_plc", 1, self._write_debounce)  # refresh after the debounce delay
+        self.coordinator.async_mark_active(self._device.get("device_id"))  # poll fast until it stops
 
-        self._device["u_is_opening_value"] = '1'
-        _LOGGER.debug(f"Opening cover {self.name}, u_is_opening_value = {self._device.get("u_is_opening_value")}")
-        await asyncio.sleep(self._write_debounce)
-        await self.coordinator.async_request_refresh()  # Trigger poll to update state
+        self._set_value(self._opening_slot, '1')
+        self.async_write_ha_state()  # optimistic state; polls only notify devices whose values changed
+        _LOGGER.debug(f"Opening cover {self.name}, u_is_opening_value = {self._value(self._opening_slot)}")
 
     async def async_close_cover(self, **kwargs: Any) -> None:
         """Close cover."""
-        await self._write("close_addr_plc", 1)
-        self._device["u_is_closing_value"] = '1'
+        await self._write("close_addr_plc", 1, self._write_debounce)
+        self.coordinator.async_mark_active(self._device.get("device_id"))
+        self._set_value(self._closing_slot, '1')
+        self.async_write_ha_state()
         _LOGGER.debug(f"Closing cover {self.name}")
-        await asyncio.sleep(self._write_debounce)
-        await self.coordinator.async_request_refresh()
 
     async def async_stop_cover(self, **kwargs: Any) -> None:
         """Stop the cover."""
-        _LOGGER.debug(f"Stopping cover {self.name}, u_is_opening_value = {self._device.get("u_is_opening_value")}")
-        if self._device.get("u_is_opening_value") == '1': 
-            await self._write("close_addr_plc", 1)
-        elif self._device.get("u_is_closing_value") == '1': 
-            await self._write("open_addr_plc", 1)
+        _LOGGER.debug(f"Stopping cover {self.name}, u_is_opening_value = {self._value(self._opening_slot)}")
+        if self._value(self._opening_slot) == '1': 
+            await self._write("close_addr_plc", 1, self._write_debounce)
+        elif self._value(self._closing_slot) == '1': 
+            await self._write("open_addr_plc", 1, self._write_debounce)
+        else:
+            # nothing to stop as far as we know - re-read the state, it may be stale (e.g. after a missed poll)
+            self.coordinator.refresh_scheduler.async_schedule(self._write_debounce, [self._device.get("device_id")])
+        self.coordinator.async_mark_active(self._device.get("device_id"))  # to see it stop
         _LOGGER.debug(f"Stopping cover {self.name}")
-        await asyncio.sleep(self._write_debounce)
-        await self.coordinator.async_request_refresh()
 
     async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Move the cover shutter to a specific position."""
         target_position = int(255 * (kwargs["position"] / 100))
-        await self._write("set_pos_addr_plc", target_position)
-        await self._write("go_to_pos_addr_plc", 1)
+        # both writes go out in one request, set_pos before go_to_pos
+        await self._write_many([("set_pos_addr_plc", target_position), ("go_to_pos_addr_plc", 1)], self._write_debounce)
+        self.coordinator.async_mark_active(self._device.get("device_id"))
         _LOGGER.debug(f"Setting cover {self.name} to position {target_position}")
-        await asyncio.sleep(self._write_debounce)
-        await self.coordinator.async_request_refresh()
@@ -0,0 +1,71 @@
+# Lookup of configured elements and their entities by device_id
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import callback
+
+
+class DeviceIndex:
+    """device_id -> elements and device_id -> entities of one config entry.
+
+    A device can have several elements: the settings entities created from the
+    'setting_*' attributes of blinds and lights share the device_id of their parent
+    (they carry an 'entity_name'), so every lookup returns all of them, the main
+    element first. The element index is rebuilt only when the elements change,
+    entities add and remove themselves as they are added to / removed from hass.
+    """
+
+    __slots__ = ("_elements", "_entities")
+
+    def __init__(self, all_elements: list[dict[str, Any]]) -> None:
+        self._elements: dict[Any, list[dict[str, Any]]] = {}
+        self._entities: dict[Any, list[Any]] = {}
+        self.rebuild(all_elements)
+
+    def rebuild(self, all_elements: list[dict[str, Any]]) -> None:
+        """Index the elements (after the configured elements changed)."""
+        index: dict[Any, list[dict[str, Any]]] = {}
+        for elem in all_elements:
+            elements = index.setdefault(elem.get("device_id"), [])
+            if "entity_name" in elem:
+                elements.append(elem)
+            else:
+                # the main element goes before the settings of the device
+                elements.insert(0, elem)
+        self._elements = index
+
+    def __contains__(self, device_id: Any) -> bool:
+        return device_id in self._elements
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def elements(self, device_id: Any) -> list[dict[str, Any]]:
+        """Return all elements of a device (main element first), or an empty list."""
+        return self._elements.get(device_id, [])
+
+    def element(self, device_id: Any) -> dict[str, Any] | None:
+        """Return the main element of a device."""
+        if elements := self._elements.get(device_id):
+            return elements[0]
+        return None
+
+    def entities(self, device_id: Any) -> list[Any]:
+        """Return the entities of a device currently added to hass."""
+        return self._entities.get(device_id, [])
+
+    @callback
+    def async_add_entity(self, device_id: Any, entity: Any) -> Callable[[], None]:
+        """Register an entity of a device; returns the callback removing it."""
+        entities = self._entities.setdefault(device_id, [])
+        entities.append(entity)
+
+        @callback
+        def remove_entity() -> None:
+            if entity in entities:
+                entities.remove(entity)
+            if not entities and self._entities.get(device_id) is entities:
+                del self._entities[device_id]
+
+        return remove_entity
@@ -0,0 +1,29 @@
+# Diagnostics of a config entry (Settings -> Devices & services -> Download diagnostics)
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ELEMENTS, CONF_SYM_FILE
+from .hub import async_get_hub
+from .metrics import collect_metrics
+
+TO_REDACT = {CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry) -> dict[str, Any]:
+    """Return the options (without the element definitions) and the performance metrics."""
+    options = {key: value for key, value in config_entry.options.items() if key not in (CONF_ELEMENTS, CONF_SYM_FILE)}
+    diagnostics = {
+        "data": async_redact_data(dict(config_entry.data), TO_REDACT),
+        "options": options,
+        "elements": len(config_entry.options.get(CONF_ELEMENTS, [])),
+    }
+    if config_entry.runtime_data is not None:
+        diagnostics["metrics"] = collect_metrics(config_entry.runtime_data)
+        diagnostics["metrics"]["phase"] = config_entry.runtime_data.scheduler.phase
+        diagnostics["controllers"] = len(async_get_hub(hass))
+    return diagnostics
@@ -9,6 +9,7 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import IntegrationCoordinator
+from .read_plan import Element
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,8 +21,14 @@ class PLC_device(CoordinatorEntity):
 
     def __init__(self, coordinator: IntegrationCoordinator, device: dict[str, Any]) -> None:
         """Initialize the entity."""
-        super().__init__(coordinator)
-        self._device = device  # Raw dict from YAML + resolved _plc addresses
+        # the device_id is the listener context, so the coordinator only notifies
+        # entities of devices whose values changed
+        super().__init__(coordinator, context=device.get("device_id"))
+        self._device = device  # Raw dict from YAML + resolved _plc addresses (read only)
+
+        # values are read from the coordinator's value table by slot (see read_plan.ValueTable)
+        self._element = Element(device, coordinator.values)
+        self._values = coordinator.values.values
 
         # if entity_name defined, reach for it first
         # entity_name is created in config_flow while adding setting devices, which inherit device_name
@@ -33,6 +40,8 @@ class PLC_device(CoordinatorEntity):
             self._id_suffix = device.get("u_data_addr", "unknown").replace(".", "_")
         if not hasattr(self, "_availability_check"):
             self._availability_check = "u_data_value"            
+        self._availability_slot = self._element.slot(self._availability_check)
+        self._data_slot = self._element.slot("u_data_value")
 
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{device.get('device_id')}_{self._id_suffix}"
 
@@ -44,14 +53,46 @@ class PLC_device(CoordinatorEntity):
 
 
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.device_index.async_add_entity(self._element.device_id, self))
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success and self._availability_check in self._device
+        return self.coordinator.last_update_success and self._value(self._availability_slot) is not None
+
+    def _value(self, slot: int | None) -> Any:
+        """Return the last value read from the PLC at a slot (None if never read)."""
+        return None if slot is None else self._values[slot]
+
+    def _set_value(self, slot: int | None, value: Any) -> None:
+        """Set a value optimistically - the next poll replaces it with the PLC's."""
+        if slot is not None:
+            self._values[slot] = value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        # the state was restored at startup and not confirmed by the PLC yet
+        if self.coordinator.stale:
+            return {"stale": True}
+        return None
     
-    async def _write(self, plc_key: str, value: Any) -> None:
+    async def _write(self, plc_key: str, value: Any, settle: float = 0) -> None:
         """Write a value to the PLC using a resolved _plc address."""
-        if plc_key not in self._device:
-            _LOGGER.error("Device %s misconfigured: missing PLC address key '%s'", self._device.get("device_id"), plc_key)
-            raise HomeAssistantError(f"Device '{self._device.get('device_id')}' missing PLC address for {plc_key}")
-        await self.coordinator.api.set_data(self._device[plc_key], value)
+        await self._write_many([(plc_key, value)], settle)
+
+    async def _write_many(self, writes: list[tuple[str, Any]], settle: float = 0) -> None:
+        """Write values to the PLC in the given order.
+
+        Writes are queued and sent together with writes of other entities made at the
+        same time. Once the batch is applied, this device alone is re-read after 'settle'
+        seconds to confirm the new state.
+        """
+        for plc_key, _ in writes:
+            if plc_key not in self._device:
+                _LOGGER.error("Device %s misconfigured: missing PLC address key '%s'", self._device.get("device_id"), plc_key)
+                raise HomeAssistantError(f"Device '{self._device.get('device_id')}' missing PLC address for {plc_key}")
+        await self.coordinator.write_queue.write_many(
+            [(self._device[plc_key], value) for plc_key, value in writes], self.coordinator, settle, self._device.get("device_id")
+        )
@@ -0,0 +1,151 @@
+# Apply changed elements to a running config entry, without reloading it
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+import homeassistant.helpers.device_registry as dr
+import homeassistant.helpers.entity_registry as er
+
+from .const import CONF_ELEMENTS, CONF_SETTINGS_GROUP_NAME, CONF_SYM_FILE, DEFAULT_COORDINATOR, DOMAIN
+from .coordinator import IntegrationCoordinator
+from .read_plan import poll_groups, without_values
+
+_LOGGER = logging.getLogger(__name__)
+
+# options which are applied in place - any other change reloads the config entry
+HOT_OPTIONS = (CONF_ELEMENTS, CONF_SYM_FILE)
+
+# groups set up for every config entry - the others exist only while their poll_interval is used
+NAMED_GROUPS = (DEFAULT_COORDINATOR, "hourly", CONF_SETTINGS_GROUP_NAME)
+
+
+@dataclass
+class ElementsDiff:
+    """device_ids of the devices added, removed and changed between two element lists."""
+
+    added: set[Any] = field(default_factory=set)
+    removed: set[Any] = field(default_factory=set)
+    changed: set[Any] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def _by_device(elements: list[dict[str, Any]]) -> dict[Any, list[dict[str, Any]]]:
+    devices: dict[Any, list[dict[str, Any]]] = {}
+    for elem in elements:
+        devices.setdefault(elem.get("device_id"), []).append(without_values(elem))
+    return devices
+
+
+def diff_elements(old: list[dict[str, Any]], new: list[dict[str, Any]]) -> ElementsDiff:
+    """Compare two element lists device by device.
+
+    A device is all elements sharing its device_id (the main element and its settings),
+    it changed if any of them did - a new address after a SYM file reload, a new name,
+    poll_interval, device_type...
+    """
+    old_devices = _by_device(old)
+    new_devices = _by_device(new)
+    return ElementsDiff(
+        added=new_devices.keys() - old_devices.keys(),
+        removed=old_devices.keys() - new_devices.keys(),
+        changed={device_id for device_id in old_devices.keys() & new_devices.keys() if old_devices[device_id] != new_devices[device_id]},
+    )
+
+
+def only_elements_changed(old: Mapping[str, Any], new: Mapping[str, Any]) -> bool:
+    """Return True if the options differ in the elements (or the SYM file) only."""
+    keys = (old.keys() | new.keys()) - set(HOT_OPTIONS)
+    return all(old.get(key) == new.get(key) for key in keys)
+
+
+def async_remove_devices(hass: HomeAssistant, config_entry: ConfigEntry, device_ids: set[Any]) -> None:
+    """Remove devices which are not configured anymore (and their entities) from the registry."""
+    device_registry = dr.async_get(hass)
+    for device_id in device_ids:
+        device = device_registry.async_get_device(identifiers={(DOMAIN, device_id)})
+        if device is not None and config_entry.entry_id in device.config_entries:
+            device_registry.async_update_device(device.id, remove_config_entry_id=config_entry.entry_id)
+
+
+async def async_apply_elements(hass: HomeAssistant, config_entry: ConfigEntry) -> ElementsDiff:
+    """Bring a running config entry to its current elements.
+
+    Only the entities of added, removed and changed devices are touched: the entities of
+    removed and changed devices are removed, the read plans of the coordinators are
+    recompiled in place (into the same value tables, so unchanged entities keep their
+    slots and values), coordinators are added for new poll intervals and removed for
+    poll intervals not used anymore, and the entities of added and changed devices
+    are created by the platforms and read at once.
+    """
+    runtime_data = config_entry.runtime_data
+    elements = config_entry.options.get(CONF_ELEMENTS, [])
+    diff = diff_elements(runtime_data.options.get(CONF_ELEMENTS, []), elements)
+    if not diff:
+        return diff
+
+    _LOGGER.debug("Elements changed - %d devices added, %d removed, %d changed", len(diff.added), len(diff.removed), len(diff.changed))
+
+    # registry entries of changed devices: {(domain, unique_id): entity_id}
+    old_entries: dict[tuple[str, str], str] = {}
+    for device_id in diff.removed | diff.changed:
+        for entity in list(runtime_data.device_index.entities(device_id)):
+            if entity.registry_entry is not None and device_id in diff.changed:
+                old_entries[(entity.registry_entry.domain, entity.unique_id)] = entity.entity_id
+            await entity.async_remove()
+    async_remove_devices(hass, config_entry, diff.removed)
+
+    # the new read plans, the values of unchanged addresses stay where they are
+    runtime_data.device_index.rebuild(elements)
+    for coordinator in runtime_data.coordinators.values():
+        coordinator.rebuild_read_plan(elements)
+
+    # groups of poll intervals not used before
+    for group_name, interval in poll_groups(elements).items():
+        if group_name not in runtime_data.coordinators:
+            coordinator = IntegrationCoordinator(
+                hass, config_entry, runtime_data.connection.session, group_name, interval,
+                runtime_data.write_queue, runtime_data.scheduler.reader, runtime_data.device_index,
+            )
+            runtime_data.coordinators[group_name] = coordinator
+            runtime_data.value_cache.add(coordinator)
+            runtime_data.scheduler.add(coordinator)
+
+    # groups of poll intervals not used anymore - their entities were removed above
+    groups = poll_groups(elements).keys() | set(NAMED_GROUPS)
+    for group_name in [name for name in runtime_data.coordinators if name not in groups]:
+        coordinator = runtime_data.coordinators.pop(group_name)
+        runtime_data.scheduler.remove(coordinator)
+        runtime_data.value_cache.remove(coordinator)
+        await coordinator.async_shutdown()
+        _LOGGER.debug("%s coordinator removed - no element uses its poll_interval anymore", group_name)
+
+    # entities of the added and changed devices
+    new_devices = diff.added | diff.changed
+    new_elements = [elem for elem in elements if elem.get("device_id") in new_devices]
+    new_entities = [
+        (domain, entities_for(config_entry, new_elements), async_add_entities)
+        for domain, entities_for, async_add_entities in runtime_data.platforms
+    ]
+
+    # entities a changed device does not have anymore (e.g. its address or device_type changed)
+    # leave the registry first, so the new entities can take over their entity_ids
+    new_keys = {(domain, entity.unique_id) for domain, entities, _ in new_entities for entity in entities}
+    entity_registry = er.async_get(hass)
+    for key, entity_id in old_entries.items():
+        if key not in new_keys and entity_registry.async_get(entity_id) is not None:
+            entity_registry.async_remove(entity_id)
+
+    for _, entities, async_add_entities in new_entities:
+        async_add_entities(entities)
+
+    # the new devices are read now, not at the next poll of their group
+    for coordinator in runtime_data.coordinators.values():
+        await coordinator.async_refresh_devices(new_devices)
+
+    return diff
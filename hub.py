@@ -0,0 +1,55 @@
+# All PLCs configured in Home Assistant - one config entry per controller
+
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .poll_scheduler import PollScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# phases k * 0.618... (mod 1) stay evenly spread however many controllers are added
+PHASE_STEP = 0.6180339887498949
+
+
+class PLCHub:
+    """Shared state of all controllers (config entries) of the integration.
+
+    Each controller keeps its own read plans, connection and concurrency limit,
+    and its PollScheduler merges the reads of its groups. The hub places the
+    schedulers on the poll grid: every controller gets its own phase, so with
+    several controllers polled at the same interval their polls are spread over
+    the interval instead of all firing on the same tick.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._schedulers: dict[str, PollScheduler] = {}  # {entry_id: scheduler}
+        self._slots: dict[str, int] = {}                 # {entry_id: index of its phase}
+
+    def __len__(self) -> int:
+        return len(self._schedulers)
+
+    @callback
+    def async_add(self, entry_id: str, scheduler: PollScheduler) -> None:
+        """Register the scheduler of a controller and give it a free phase."""
+        used = set(self._slots.values())
+        slot = next(index for index in range(len(used) + 1) if index not in used)
+        self._slots[entry_id] = slot
+        self._schedulers[entry_id] = scheduler
+        scheduler.phase = (slot * PHASE_STEP) % 1
+        _LOGGER.debug("PLC %s polled at phase %.3f of its intervals (%d controllers)", scheduler.reader.api.host, scheduler.phase, len(self._schedulers))
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        self._schedulers.pop(entry_id, None)
+        self._slots.pop(entry_id, None)
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> PLCHub:
+    """Return the hub, creating it with the first config entry."""
+    if DOMAIN not in hass.data:
+        hass.data[DOMAIN] = PLCHub(hass)
+    return hass.data[DOMAIN]
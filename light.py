@@ -4,13 +4,14 @@ import logging
 from typing import Any
 
 from homeassistant.components.light import ColorMode, LightEntity
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import CONF_ELEMENTS, DEFAULT_COORDINATOR
+from .const import CONF_ELEMENTS
 from .coordinator import IntegrationCoordinator
 
 from .generic_device import PLC_device
@@ -21,16 +22,23 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
 
     full_elements = config_entry.options.get(CONF_ELEMENTS, [])
     
-    entities = [
+    entities = _entities_for(config_entry, full_elements)
+    
+    # elements added or changed later are set up without reloading (see hot_reload.py)
+    config_entry.runtime_data.add_platform(Platform.LIGHT, _entities_for, async_add_entities)
+    async_add_entities(entities)
+
+
+def _entities_for(config_entry: ConfigEntry, elements: list[dict[str, Any]]) -> list[PLC_device]:
+    """Create the entities of the given elements handled by this platform."""
+    return [
       OnOffLight(
-          config_entry.runtime_data.coordinators[elem.get("coordinator_name", DEFAULT_COORDINATOR)], 
+          config_entry.runtime_data.coordinator_for(elem), 
           elem
       )
-      for elem in full_elements
+      for elem in elements
       if elem.get("device_type") == "ON_OFF_LIGHT"
     ]
-    
-    async_add_entities(entities)
 
 
 class OnOffLight(PLC_device, LightEntity):
@@ -47,12 +55,13 @@ class OnOffLight(PLC_device, LightEntity):
         self._change_type = device.get("change_type", "tap")
 
         super().__init__(coordinator, device)  # Handles name, unique_id, device_info    
+        self._state_slot = self._element.slot("u_state_value")
 
     @property
     def is_on(self) -> bool | None:
         """Return if the light is on."""
         # This needs to enumerate to true or false
-        value = self._device.get("u_state_value")
+        value = self._value(self._state_slot)
         if value is None:
             return False
         return bool(int(value))
@@ -80,12 +89,8 @@ class OnOffLight(PLC_device, LightEntity):
         if value_to_write > -1:
           await self._write("change_addr_plc", value_to_write)
 
-        await self.coordinator.async_refresh()
-
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
         value_to_write = self._turn("OFF")
         if value_to_write > -1:
-          await self._write("change_addr_plc", value_to_write)
-
-        await self.coordinator.async_refresh()
\ No newline at end of file
+          await self._write("change_addr_plc", value_to_write)
\ No newline at end of file
@@ -0,0 +1,115 @@
+# Performance metrics of the communication with the PLC
+
+import statistics
+from collections import deque
+from typing import Any
+
+RECENT_SAMPLES = 500  # samples kept for percentiles
+
+# upper bounds of the histogram buckets
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS = (1, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Bucketed counts of all samples plus a window of recent samples for percentiles."""
+
+    __slots__ = ("buckets", "counts", "count", "total", "max", "last", "_recent")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one counts samples above all buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: float | None = None
+        self._recent: deque[float] = deque(maxlen=RECENT_SAMPLES)
+
+    def record(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.last = value
+        self._recent.append(value)
+
+    def percentile(self, percent: int) -> float | None:
+        """Return the percentile of the recent samples."""
+        if not self._recent:
+            return None
+        if len(self._recent) == 1:
+            return self._recent[0]
+        return statistics.quantiles(self._recent, n=100, method="inclusive")[percent - 1]
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean": _round(self.total / self.count) if self.count else None,
+            "last": _round(self.last),
+            "max": _round(self.max),
+            "p50": _round(self.percentile(50)),
+            "p90": _round(self.percentile(90)),
+            "p99": _round(self.percentile(99)),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+def collect_metrics(runtime_data: Any) -> dict[str, Any]:
+    """Snapshot of the counters of all parts talking to one PLC (for diagnostics and sensors)."""
+    scheduler = runtime_data.scheduler
+    reader = scheduler.reader
+    write_queue = runtime_data.write_queue
+    connection = runtime_data.connection
+
+    return {
+        "polls": {
+            "reads": scheduler.ticks,
+            "group_polls": scheduler.group_polls,
+            "motion_polls": scheduler.motion_polls,
+            "failed": scheduler.failed_polls,
+            "duration_ms": scheduler.poll_duration.as_dict(),
+            "addresses": scheduler.poll_size.as_dict(),
+        },
+        "reads": {
+            "requests": reader.requests,
+            "failed_chunks": reader.failed_chunks,
+            "mismatched_chunks": reader.mismatched_chunks,
+            "bytes_sent": reader.bytes_sent,
+            "bytes_received": reader.bytes_received,
+        },
+        "writes": {
+            "requests": write_queue.batches,
+            "values": write_queue.values_written,
+            "failed": write_queue.failed_batches,
+            "latency_ms": write_queue.write_latency.as_dict(),
+        },
+        "connection": {
+            "state": connection.state,
+            "opened": connection.opened,
+            "rejected": connection.rejected,
+            "failures": connection.total_failures,
+        },
+        "groups": {
+            name: {
+                "interval": coordinator.poll_interval,
+                "addresses": len(coordinator.read_plan),
+                "last_update_success": coordinator.last_update_success,
+                "stale": coordinator.stale,
+                "suppressed_updates": coordinator.suppressed_updates,
+                "refresh_requests": coordinator.refresh_scheduler.requests,
+                "refresh_polls": coordinator.refresh_scheduler.polls,
+                "moving_devices": len(coordinator.active_devices),
+            }
+            for name, coordinator in runtime_data.coordinators.items()
+        },
+    }
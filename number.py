@@ -2,16 +2,15 @@
 
 import logging
 from typing import Any
-import asyncio
 
 from homeassistant.components.number import NumberDeviceClass, NumberEntity, NumberMode
-from homeassistant.const import UnitOfTemperature, UnitOfTime, UnitOfLength, DEGREE
+from homeassistant.const import Platform, UnitOfTemperature, UnitOfTime, UnitOfLength, DEGREE
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 
-from .const import CONF_WRITE_DEBOUNCE, CONF_ELEMENTS, DEFAULT_COORDINATOR
+from .const import CONF_WRITE_DEBOUNCE, CONF_ELEMENTS
 from .coordinator import IntegrationCoordinator
 
 from .generic_device import PLC_device
@@ -53,15 +52,23 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
 
     full_elements = config_entry.options.get(CONF_ELEMENTS, [])
 
-    entities = [
+    entities = _entities_for(config_entry, full_elements)
+    # elements added or changed later are set up without reloading (see hot_reload.py)
+    config_entry.runtime_data.add_platform(Platform.NUMBER, _entities_for, async_add_entities)
+    async_add_entities(entities)
+
+
+def _entities_for(config_entry: ConfigEntry, elements: list[dict[str, Any]]) -> list[PLC_device]:
+    """Create the entities of the given elements handled by this platform."""
+    return [
       Number(
-          config_entry.runtime_data.coordinators[elem.get("coordinator_name", DEFAULT_COORDINATOR)], 
+          config_entry.runtime_data.coordinator_for(elem), 
           elem
       )
-      for elem in full_elements
+      for elem in elements
       if elem.get("device_type") in DEVICE_TYPE_TO_CLASS
     ]
-    async_add_entities(entities)
+
 
 class Number(PLC_device, NumberEntity):
     # Implementation of a temperature setpoint number entity.
@@ -98,7 +105,7 @@ class Number(PLC_device, NumberEntity):
     @property
     def native_value(self) -> int | None:
         """Return the value of the sensor."""
-        value = self._device.get("u_data_value")
+        value = self._value(self._data_slot)
         if value is None:
             return None
         try:
@@ -111,13 +118,11 @@ class Number(PLC_device, NumberEntity):
         """Set new setpoint value and write to PLC."""
         # Update local state first (optimistic update)
         new_value = int(value * self._divisor)
-        self._device["u_data_value"] = new_value
+        self._set_value(self._data_slot, new_value)
+        self.async_write_ha_state()  # polls only notify devices whose values changed
 
-        # Write to PLC via your API 
-        await self._write("u_data_addr_plc", new_value)
+        # Write to PLC via the write queue, which refreshes the coordinator
+        # after the debounce delay to confirm the value
+        await self._write("u_data_addr_plc", new_value, self._write_debounce)
 
         _LOGGER.debug(f"Set {self.name} to {value}")
-
-        # Debounce and refresh (like in cover.py)
-        await asyncio.sleep(self._write_debounce)
-        await self.coordinator.async_refresh()  # Immediate update to confirmvv
\ No newline at end of file
@@ -0,0 +1,292 @@
+# One scheduler polling all coordinator groups of a PLC
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .batch_reader import BatchReader
+from .connection import PLCConnection
+from .const import DEFAULT_MOTION_POLL_INTERVAL, POLL_MERGE_RATIO, POLL_RETRY_INTERVAL
+from .metrics import DURATION_BUCKETS_MS, SIZE_BUCKETS, Histogram
+from .profiler import PollProfiler, PollTrace
+from .read_plan import ReadPlan
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Drive the polls of every coordinator group with a single timer.
+
+    Each group (coordinator) has its own poll interval - the named "live", "hourly" and
+    "settings" groups, and one group per 'poll_interval' used in the elements. On every
+    tick the addresses of all groups which are due (or will be due within POLL_MERGE_RATIO
+    of their interval) are merged into one batched read, so fast inputs can be polled
+    every fraction of a second while static setpoints cost nothing extra.
+    The coordinators do not poll on their own (their update_interval is None), the
+    results are handed to them with async_set_updated_data / async_set_update_error.
+
+    Devices in motion (the 'active_devices' of the coordinators, e.g. moving covers)
+    are additionally read every 'motion_interval' seconds - all of them in one read -
+    until they stop, then they drop back to the rate of their group.
+
+    With a 'profiler' every poll is traced phase by phase (see profiler.py).
+
+    Polls run on a fixed grid - every multiple of the group's interval, shifted by
+    'phase' (a share of the shortest interval of the PLC). Groups of one PLC share the
+    shift, so they keep being read together, and the hub gives each PLC its own phase,
+    so several controllers are not all polled at the same moment (see hub.py).
+    """
+
+    def __init__(self, hass: HomeAssistant, reader: BatchReader, motion_interval: float = DEFAULT_MOTION_POLL_INTERVAL, connection: PLCConnection | None = None, profiler: PollProfiler | None = None) -> None:
+        self.hass = hass
+        self.reader = reader
+        self.motion_interval = motion_interval
+        self.connection = connection  # while the PLC is down, polls wait for its retry time
+        self.profiler = profiler
+        self.phase = 0.0  # offset of the poll grid, as a share of the shortest interval (set by the hub)
+
+        self._groups: dict[str, Any] = {}    # {group name: IntegrationCoordinator}
+        self._due: dict[str, float] = {}     # {group name: loop time of the next poll}
+        self._requested: set[str] = set()    # groups to read in the next tick, out of their turn
+        self._handle: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self._failing = False
+        self._motion_due: float | None = None  # loop time of the next read of moving devices
+
+        self.ticks = 0           # merged reads made
+        self.group_polls = 0     # group polls served by them
+        self.motion_polls = 0    # reads of moving devices (alone or along with due groups)
+        self.failed_polls = 0
+        self.poll_duration = Histogram(DURATION_BUCKETS_MS)  # ms per merged read
+        self.poll_size = Histogram(SIZE_BUCKETS)             # addresses per merged read
+
+    def add(self, coordinator: Any) -> None:
+        """Register a coordinator group, first polled one interval after start.
+
+        A group added while polling (a new poll_interval in the elements) is read in the next tick.
+        """
+        self._groups[coordinator.group_name] = coordinator
+        coordinator.poll_scheduler = self
+        coordinator.profiler = self.profiler
+        if self._running:
+            self._due[coordinator.group_name] = self.hass.loop.time()
+            self._schedule_next()
+
+    def remove(self, coordinator: Any) -> None:
+        """Stop polling a coordinator group (its poll_interval is not used anymore)."""
+        name = coordinator.group_name
+        if self._groups.get(name) is not coordinator:
+            return
+        del self._groups[name]
+        self._due.pop(name, None)
+        self._requested.discard(name)
+        coordinator.poll_scheduler = None
+        coordinator.active_devices.clear()
+
+    async def async_refresh_groups(self, coordinators: Iterable[Any]) -> None:
+        """Load the given groups now, all in one read (the first refresh at startup).
+
+        Raises the read error, so the setup can be retried.
+        """
+        groups = [(coordinator, coordinator.read_plan) for coordinator in coordinators if coordinator.read_plan.addrs]
+        if not groups:
+            return
+
+        trace = self.profiler.start("startup") if self.profiler is not None else None
+        results = await self._read_plans([plan for _, plan in groups], trace)
+        self.ticks += 1
+        self.group_polls += len(groups)
+        for (coordinator, plan), values in zip(groups, results):
+            coordinator.async_set_poll_result(plan, values, trace)
+        if trace is not None:
+            self.profiler.finish(trace)
+
+    @callback
+    def async_start(self, due_in: dict[str, float] | None = None) -> None:
+        """Start polling.
+
+        Groups in 'due_in' are first read after the given number of seconds (0 - in the
+        first tick, for groups not loaded at startup), the others at their first slot
+        of the poll grid at least half an interval after their first refresh.
+        """
+        now = self.hass.loop.time()
+        due_in = due_in or {}
+        for name, coordinator in self._groups.items():
+            if name in due_in:
+                self._due[name] = now + due_in[name]
+            else:
+                self._due[name] = self._next_slot(now + coordinator.poll_interval / 2, coordinator.poll_interval)
+        self._running = True
+        self._schedule_next()
+
+    @callback
+    def async_stop(self) -> None:
+        self._running = False
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @callback
+    def async_poll_now(self, group_name: str) -> None:
+        """Make a group due immediately - it is read in the next tick with the other due groups."""
+        if group_name not in self._groups or not self._running:
+            return
+        # the regular polls of the group stay on the grid
+        self._requested.add(group_name)
+        self._schedule_next()
+
+    @callback
+    def async_activity_changed(self) -> None:
+        """Start fast polling when a device started moving."""
+        if not self.motion_interval or self._motion_due is not None:
+            return
+        self._motion_due = self.hass.loop.time() + self.motion_interval
+        self._schedule_next()
+
+    def _in_motion(self) -> bool:
+        return bool(self.motion_interval) and any(coordinator.active_devices for coordinator in self._groups.values())
+
+    @callback
+    def _schedule_next(self) -> None:
+        if not self._running or self._task is not None or not self._due:
+            # a running tick schedules the next one when it is done
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+
+        when = min(self._due.values())
+        if self._requested:
+            when = min(when, self.hass.loop.time())
+        if self._in_motion():
+            if self._motion_due is None:
+                self._motion_due = self.hass.loop.time() + self.motion_interval
+            when = min(when, self._motion_due)
+        else:
+            self._motion_due = None
+
+        if self.connection is not None and not self.connection.available:
+            # back off while the PLC is down - the next read probes it
+            when = max(when, self.connection.retry_at)
+        self._handle = self.hass.loop.call_at(when, self._tick)
+
+    @callback
+    def _tick(self) -> None:
+        self._handle = None
+        self._task = self.hass.async_create_background_task(self._async_poll_due(), f"{self.__class__.__name__} poll")
+        self._task.add_done_callback(self._tick_done)
+
+    @callback
+    def _tick_done(self, task: asyncio.Task) -> None:
+        self._task = None
+        self._schedule_next()
+
+    def _next_slot(self, after: float, interval: float) -> float:
+        """Return the first time on the poll grid of an interval later than 'after'."""
+        offset = self.phase * min(coordinator.poll_interval for coordinator in self._groups.values())
+        return offset + (math.floor((after - offset) / interval) + 1) * interval
+
+    def _due_groups(self, now: float) -> list[Any]:
+        """Return the groups due now, and those almost due, which are cheaper to read along."""
+        due = []
+        for name, coordinator in self._groups.items():
+            margin = coordinator.poll_interval * POLL_MERGE_RATIO
+            if self._due[name] - now <= margin:
+                due.append(coordinator)
+                self._due[name] = self._next_slot(now + margin, coordinator.poll_interval)
+            elif name in self._requested:
+                due.append(coordinator)
+        self._requested.clear()
+        return due
+
+    async def _read_plans(self, plans: list[ReadPlan], trace: PollTrace | None = None) -> list[list[Any]]:
+        """Read the addresses of several plans in one request (each address once), return values per plan."""
+        addrs: list[str] = []
+        positions: dict[str, int] = {}
+        for plan in plans:
+            for addr in plan.addrs:
+                if addr not in positions:
+                    positions[addr] = len(addrs)
+                    addrs.append(addr)
+
+        self.poll_size.record(len(addrs))
+        if trace is not None:
+            trace.addresses = len(addrs)
+            trace.mark("build")
+        start = time.perf_counter()
+        try:
+            values = await self.reader.read(addrs)
+        except Exception:
+            self.failed_polls += 1
+            raise
+        finally:
+            self.poll_duration.record((time.perf_counter() - start) * 1000)
+            if trace is not None:
+                trace.mark("read")
+        results = [[values[positions[addr]] for addr in plan.addrs] for plan in plans]
+        if trace is not None:
+            trace.mark("split")
+        return results
+
+    async def _async_poll_due(self) -> None:
+        now = self.hass.loop.time()
+        # the plans are taken now - a plan rebuilt during the read applies from the next tick
+        due = self._due_groups(now)
+        groups = [(coordinator, coordinator.read_plan) for coordinator in due if coordinator.read_plan.addrs]
+
+        # moving devices of groups which are not due anyway - read along, as a partial refresh
+        moving = []
+        if self._motion_due is not None and self._motion_due - now <= self.motion_interval * POLL_MERGE_RATIO:
+            self._motion_due = now + self.motion_interval
+            self.motion_polls += 1
+            for coordinator in self._groups.values():
+                if coordinator.active_devices and coordinator not in due:
+                    plan = coordinator.read_plan.subset(coordinator.active_devices)
+                    if plan.addrs:
+                        moving.append((coordinator, plan))
+
+        if not groups and not moving:
+            return
+
+        self.ticks += 1
+        self.group_polls += len(groups)
+        trace = self.profiler.start("+".join(c.group_name for c, _ in groups + moving)) if self.profiler is not None else None
+
+        try:
+            # one read for every address of the due groups
+            results = await self._read_plans([plan for _, plan in groups + moving], trace)
+        except Exception as err:
+            # the coordinators log the failure when they become unavailable
+            _LOGGER.debug("Polling %s failed: %s", ", ".join(c.group_name for c, _ in groups + moving), err)
+            self._failing = True
+            for coordinator, _ in groups:
+                coordinator.async_set_poll_error(err)
+                # slow groups must not stay unavailable for a whole interval
+                self._due[coordinator.group_name] = now + min(coordinator.poll_interval, POLL_RETRY_INTERVAL)
+            # no fast polling while the PLC does not answer
+            for coordinator in self._groups.values():
+                coordinator.active_devices.clear()
+            if trace is not None:
+                trace.mark("error")
+                self.profiler.finish(trace)
+            return
+
+        if self._failing:
+            _LOGGER.info("Polling the PLC recovered")
+            self._failing = False
+
+        _LOGGER.debug("Polled %s and %d moving devices in one read", ", ".join(c.group_name for c, _ in groups) or "no groups", sum(len(c.active_devices) for c, _ in moving))
+        for (coordinator, plan), values in zip(groups, results):
+            coordinator.async_set_poll_result(plan, values, trace)
+        for (coordinator, plan), values in zip(moving, results[len(groups):]):
+            coordinator.async_set_partial_result(plan, values, trace)
+        if trace is not None:
+            self.profiler.finish(trace)
@@ -0,0 +1,128 @@
+# Opt-in profiling of slow polls, written to a JSON lines trace file
+
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DEFAULT_PROFILE_THRESHOLD, PROFILE_SLOWEST_LISTENERS, PROFILE_TRACE_BACKUPS, PROFILE_TRACE_MAX_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollTrace:
+    """Timestamps of the phases of one poll.
+
+    mark() closes the phase running since the previous mark, so a poll reads as
+    build -> read -> split -> <group>.scatter -> <group>.listeners ...
+    """
+
+    __slots__ = ("name", "started", "addresses", "phases", "listeners", "_start", "_last")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = time.time()
+        self.addresses = 0
+        self.phases: dict[str, float] = {}             # {phase: ms}
+        self.listeners: list[tuple[float, str, str]] = []  # (ms, group, device_id) of entity updates
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def listener(self, group_name: str, context: Any, duration_ms: float) -> None:
+        self.listeners.append((duration_ms, group_name, str(context)))
+
+    @property
+    def duration_ms(self) -> float:
+        return (self._last - self._start) * 1000
+
+    def as_dict(self) -> dict[str, Any]:
+        slowest = sorted(self.listeners, reverse=True)[:PROFILE_SLOWEST_LISTENERS]
+        return {
+            "time": self.started,
+            "poll": self.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "addresses": self.addresses,
+            "phases_ms": {phase: round(ms, 3) for phase, ms in self.phases.items()},
+            "listeners": len(self.listeners),
+            "listeners_ms": round(sum(ms for ms, _, _ in self.listeners), 3),
+            "slowest_listeners": [{"group": group, "device_id": device_id, "ms": round(ms, 3)} for ms, group, device_id in slowest],
+        }
+
+
+class PollProfiler:
+    """Trace the phases of polls and keep the ones slower than 'threshold_ms'.
+
+    Traces are appended to a rotating JSON lines file (one poll per line) in the
+    executor, so profiling costs the event loop only the timestamps. async_close
+    waits for the pending writes - once closed, the file is not opened again.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str, threshold_ms: float = DEFAULT_PROFILE_THRESHOLD) -> None:
+        self.hass = hass
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.traced = 0   # polls profiled
+        self.written = 0  # slow polls written to the trace file
+
+        # written through the handler directly - no logger, so the trace stays out of
+        # logging's registry and of the log configuration of the integration
+        self._handler: logging.handlers.RotatingFileHandler | None = None
+        self._lock = threading.Lock()  # writes and close run in executor threads
+        self._closed = False
+        self._pending: set[asyncio.Future] = set()
+
+    @callback
+    def start(self, name: str) -> PollTrace:
+        self.traced += 1
+        return PollTrace(name)
+
+    @callback
+    def finish(self, trace: PollTrace) -> None:
+        """Write the trace if the poll was slow."""
+        if trace.duration_ms < self.threshold_ms:
+            return
+        self.written += 1
+        line = json.dumps(trace.as_dict())
+        future = self.hass.async_add_executor_job(self._write, line)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._write_line(line)
+
+    def _write_line(self, line: str) -> None:
+        if self._handler is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=PROFILE_TRACE_MAX_BYTES, backupCount=PROFILE_TRACE_BACKUPS, encoding="utf-8"
+            )
+            _LOGGER.info("Writing polls slower than %s ms to %s", self.threshold_ms, self.path)
+        # the handler rotates the file before the line if it would grow too large
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO, "levelname": "INFO"}))
+
+    async def async_close(self) -> None:
+        """Wait for the traces not written yet, then close the trace file."""
+        if self._pending:
+            await asyncio.wait(list(self._pending))
+        await self.hass.async_add_executor_job(self.close)
+
+    def close(self) -> None:
+        """Close the trace file (blocking) - later writes are dropped."""
+        with self._lock:
+            self._closed = True
+            if self._handler is not None:
+                self._handler.close()
+                self._handler = None
@@ -0,0 +1,190 @@
+# Compiled read plans used by the coordinators
+
+import logging
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from .const import CONF_POLL_INTERVAL, DEFAULT_COORDINATOR, MIN_POLL_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# readable attributes look like "u_state_addr_plc" and their value is stored in "u_state_value"
+READ_PREFIX = "u_"
+PLC_ADDR_SUFFIX = "_addr_plc"
+VALUE_SUFFIX = "_value"
+
+
+def value_key_for(addr_key: str) -> str:
+    """Return the key holding the value read from a 'u_*_addr_plc' address."""
+    return addr_key[:-len(PLC_ADDR_SUFFIX)] + VALUE_SUFFIX
+
+
+def without_values(elem: dict[str, Any]) -> dict[str, Any]:
+    """Return the element without the values earlier versions stored in the options."""
+    return {key: value for key, value in elem.items() if not (key.startswith(READ_PREFIX) and key.endswith(VALUE_SUFFIX))}
+
+
+def readable_addresses(elem: dict[str, Any]) -> Iterator[tuple[str, str]]:
+    """Yield (key, PLC address) of the readable 'u_*_addr_plc' attributes of an element."""
+    for key, addr in elem.items():
+        if key.startswith(READ_PREFIX) and key.endswith(PLC_ADDR_SUFFIX):
+            yield key, addr
+
+
+def poll_interval_of(elem: dict[str, Any]) -> float | None:
+    """Return the element's own poll interval in seconds, or None if it uses a named group."""
+    interval = elem.get(CONF_POLL_INTERVAL)
+    if interval is None:
+        return None
+    return max(float(interval), MIN_POLL_INTERVAL)
+
+
+def group_name_for(elem: dict[str, Any]) -> str:
+    """Return the name of the poll group (coordinator) of an element.
+
+    Elements with a 'poll_interval' share a group with every element polled at the same
+    rate (e.g. "0.5s"), the others belong to their 'coordinator_name' group ("live" by default).
+    """
+    interval = poll_interval_of(elem)
+    if interval is not None:
+        return f"{interval:g}s"
+    return elem.get("coordinator_name", DEFAULT_COORDINATOR)
+
+
+def poll_groups(all_elements: list[dict[str, Any]]) -> dict[str, float]:
+    """Return {group name: interval} of the groups created by elements' poll_interval."""
+    groups = {}
+    for elem in all_elements:
+        interval = poll_interval_of(elem)
+        if interval is not None:
+            groups[group_name_for(elem)] = interval
+    return groups
+
+
+class ValueTable:
+    """Values read from the PLC for one coordinator group - one slot per PLC address.
+
+    Slots are allocated while read plans and entities are set up, afterwards polls
+    only overwrite the preallocated list and entities read their values by slot
+    index. The values are runtime state only, they never go into the config entry.
+    """
+
+    __slots__ = ("values", "_slots")
+
+    def __init__(self) -> None:
+        self.values: list[Any] = []      # None until the address was read
+        self._slots: dict[str, int] = {}  # {PLC address: slot}
+
+    def slot_for(self, addr: str) -> int:
+        """Return the slot of an address, allocating it on first use."""
+        slot = self._slots.get(addr)
+        if slot is None:
+            slot = self._slots[addr] = len(self.values)
+            self.values.append(None)
+        return slot
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Element:
+    """Runtime form of a configured element: its configuration and the slots of its values.
+
+    'config' is the element dict from the options and is only read; the value read
+    from "u_state_addr_plc" is found at slots["u_state_value"] of the group's table.
+    """
+
+    __slots__ = ("config", "device_id", "slots")
+
+    def __init__(self, config: dict[str, Any], table: ValueTable) -> None:
+        self.config = config
+        self.device_id = config.get("device_id")
+        self.slots: dict[str, int] = {value_key_for(key): table.slot_for(addr) for key, addr in readable_addresses(config)}
+
+    def slot(self, value_key: str) -> int | None:
+        return self.slots.get(value_key)
+
+
+class ReadPlan:
+    """Addresses polled by one coordinator group and where their values go.
+
+    The plan is compiled once from the configured elements, so a poll only has
+    to send 'addrs' (each address once) to the PLC and scatter the reply into the
+    value table through 'slots', marking the devices reading each address as changed
+    ('devices', parallel to 'addrs').
+    """
+
+    __slots__ = ("group_name", "table", "elements", "addrs", "slots", "devices", "_device_index", "_addr_index")
+
+    def __init__(self, group_name: str, table: ValueTable, elements: list[Element], addrs: list[str], slots: list[int], devices: list[tuple[Any, ...]]) -> None:
+        self.group_name = group_name
+        self.table = table
+        self.elements = elements
+        self.addrs = addrs
+        self.slots = slots
+        self.devices = devices
+
+        # positions in 'addrs' per device_id and per PLC address, for partial refreshes
+        self._device_index: dict[Any, list[int]] = {}
+        self._addr_index: dict[str, int] = {}
+        for index, (addr, device_ids) in enumerate(zip(addrs, devices)):
+            self._addr_index[addr] = index
+            for device_id in device_ids:
+                self._device_index.setdefault(device_id, []).append(index)
+
+    @classmethod
+    def compile(cls, all_elements: list[dict[str, Any]], group_name: str, table: ValueTable | None = None) -> "ReadPlan":
+        """Build the plan for elements of the given coordinator group, allocating their slots in 'table'."""
+        table = table if table is not None else ValueTable()
+        elements = [Element(elem, table) for elem in all_elements if group_name_for(elem) == group_name]
+
+        addrs: list[str] = []
+        slots: list[int] = []
+        devices: list[list[Any]] = []
+        positions: dict[int, int] = {}  # {slot: position in addrs}
+        for element in elements:
+            for key, addr in readable_addresses(element.config):
+                slot = element.slots[value_key_for(key)]
+                index = positions.get(slot)
+                if index is None:
+                    positions[slot] = len(addrs)
+                    addrs.append(addr)
+                    slots.append(slot)
+                    devices.append([element.device_id])
+                elif element.device_id not in devices[index]:
+                    devices[index].append(element.device_id)
+
+        _LOGGER.debug("%s read plan compiled: %d elements, %d addresses", group_name, len(elements), len(addrs))
+        return cls(group_name, table, elements, addrs, slots, [tuple(device_ids) for device_ids in devices])
+
+    def __len__(self) -> int:
+        return len(self.addrs)
+
+    def subset(self, device_ids: Iterable[Any] = (), addrs: Iterable[str] = ()) -> "ReadPlan":
+        """Return a plan reading only the given devices and/or PLC addresses."""
+        indices: set[int] = set()
+        for device_id in device_ids:
+            indices.update(self._device_index.get(device_id, ()))
+        for addr in addrs:
+            if (index := self._addr_index.get(addr)) is not None:
+                indices.add(index)
+
+        selected = sorted(indices)
+        devices = [self.devices[i] for i in selected]
+        selected_devices = {device_id for device_ids in devices for device_id in device_ids}
+        elements = [element for element in self.elements if element.device_id in selected_devices]
+        return ReadPlan(self.group_name, self.table, elements, [self.addrs[i] for i in selected], [self.slots[i] for i in selected], devices)
+
+    def scatter(self, values: list[Any]) -> set[Any]:
+        """Write values returned by the PLC into the value table.
+
+        Returns the device_ids of elements whose values changed since the last poll.
+        None values (from chunks which could not be read) keep the previous value.
+        """
+        table = self.table.values
+        changed = set()
+        for slot, device_ids, val in zip(self.slots, self.devices, values):
+            if val is not None and table[slot] != val:
+                table[slot] = val
+                changed.update(device_ids)
+        return changed
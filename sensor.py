@@ -1,16 +1,19 @@
 # Sensor setup 
 
 import logging
+from collections.abc import Callable
 from typing import Any
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
-from homeassistant.const import UnitOfTemperature, LIGHT_LUX, UnitOfPower
+from homeassistant.const import CONF_HOST, EntityCategory, Platform, UnitOfInformation, UnitOfTemperature, UnitOfTime, LIGHT_LUX, UnitOfPower
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import CONF_ELEMENTS, DEFAULT_COORDINATOR
+from .const import CONF_ELEMENTS, DOMAIN
 from .coordinator import IntegrationCoordinator
+from .metrics import collect_metrics
 
 from .generic_device import PLC_device
 
@@ -39,15 +42,27 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
 
     full_elements = config_entry.options.get(CONF_ELEMENTS, [])
 
-    entities = [
+    entities = _entities_for(config_entry, full_elements)
+
+    # diagnostics of the communication with the PLC
+    entities.extend(DiagnosticSensor(config_entry, *description) for description in DIAGNOSTIC_SENSORS)
+
+    # elements added or changed later are set up without reloading (see hot_reload.py)
+    config_entry.runtime_data.add_platform(Platform.SENSOR, _entities_for, async_add_entities)
+    async_add_entities(entities)
+
+
+def _entities_for(config_entry: ConfigEntry, elements: list[dict[str, Any]]) -> list[PLC_device]:
+    """Create the entities of the given elements handled by this platform."""
+    return [
       Sensor(
-          config_entry.runtime_data.coordinators[elem.get("coordinator_name", DEFAULT_COORDINATOR)], 
+          config_entry.runtime_data.coordinator_for(elem), 
           elem
       )
-      for elem in full_elements
+      for elem in elements
       if elem.get("device_type") in DEVICE_TYPE_TO_CLASS
     ]
-    async_add_entities(entities)
+
 
 class Sensor(PLC_device, SensorEntity):
     # Implementation of a sensor.
@@ -69,7 +84,7 @@ class Sensor(PLC_device, SensorEntity):
     @property
     def native_value(self) -> float | None:
         """Return the value of the sensor."""
-        value = self._device.get("u_data_value")
+        value = self._value(self._data_slot)
         if value is None:
             return None
         try:
@@ -77,4 +92,69 @@ class Sensor(PLC_device, SensorEntity):
         except ValueError:
             _LOGGER.warning("Invalid sensor value: %s", value)
             return None
-        
\ No newline at end of file
+        
+
+
+def _histogram_attributes(histogram: dict[str, Any]) -> dict[str, Any]:
+    return {key: histogram[key] for key in ("p90", "p99", "max", "mean", "count")}
+
+
+# key, name, unit, device class, state class, value and attributes taken from the metrics.collect_metrics snapshot
+DIAGNOSTIC_SENSORS: list[tuple[str, str, str | None, SensorDeviceClass | None, SensorStateClass | None, Callable[[dict], Any], Callable[[dict], dict] | None]] = [
+    ("poll_duration", "Poll duration", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT,
+        lambda m: m["polls"]["duration_ms"]["p50"], lambda m: _histogram_attributes(m["polls"]["duration_ms"])),
+    ("poll_addresses", "Addresses per poll", None, None, SensorStateClass.MEASUREMENT,
+        lambda m: m["polls"]["addresses"]["last"], lambda m: _histogram_attributes(m["polls"]["addresses"])),
+    ("polls", "Polls", None, None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m["polls"]["reads"], lambda m: {"group_polls": m["polls"]["group_polls"], "motion_polls": m["polls"]["motion_polls"]}),
+    ("poll_errors", "Poll errors", None, None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m["polls"]["failed"], lambda m: {"failed_chunks": m["reads"]["failed_chunks"]}),
+    ("response_mismatches", "Response mismatches", None, None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m["reads"]["mismatched_chunks"], None),
+    ("bytes_received", "Data received", UnitOfInformation.BYTES, SensorDeviceClass.DATA_SIZE, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m["reads"]["bytes_received"], lambda m: {"bytes_sent": m["reads"]["bytes_sent"], "requests": m["reads"]["requests"]}),
+    ("write_latency", "Write latency", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT,
+        lambda m: m["writes"]["latency_ms"]["p50"], lambda m: _histogram_attributes(m["writes"]["latency_ms"])),
+    ("write_errors", "Write errors", None, None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m["writes"]["failed"], lambda m: {"requests": m["writes"]["requests"], "values": m["writes"]["values"]}),
+    ("suppressed_updates", "Suppressed entity updates", None, None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: sum(group["suppressed_updates"] for group in m["groups"].values()), None),
+    ("connection_state", "Connection", None, SensorDeviceClass.ENUM, None,
+        lambda m: m["connection"]["state"], lambda m: {key: value for key, value in m["connection"].items() if key != "state"}),
+]
+
+
+class DiagnosticSensor(SensorEntity):
+    """Performance metric of the communication with the PLC, updated every 30 seconds."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+
+    def __init__(self, config_entry: ConfigEntry, key: str, name: str, unit: str | None, device_class: SensorDeviceClass | None,
+                 state_class: SensorStateClass | None, value_fn: Callable[[dict], Any], attributes_fn: Callable[[dict], dict] | None) -> None:
+        self._config_entry = config_entry
+        self._value_fn = value_fn
+        self._attributes_fn = attributes_fn
+
+        self._attr_name = name
+        self._attr_unique_id = f"{config_entry.entry_id}_diagnostic_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        if device_class == SensorDeviceClass.ENUM:
+            self._attr_options = ["closed", "open", "half_open"]
+
+        # all diagnostics belong to one device representing the PLC
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=f"WAGO PLC {config_entry.data[CONF_HOST]}",
+            configuration_url=f"http://{config_entry.data[CONF_HOST]}/PLC/webvisu.htm",
+        )
+
+    async def async_update(self) -> None:
+        if self._config_entry.runtime_data is None:
+            return
+        metrics = collect_metrics(self._config_entry.runtime_data)
+        self._attr_native_value = self._value_fn(metrics)
+        if self._attributes_fn is not None:
+            self._attr_extra_state_attributes = self._attributes_fn(metrics)
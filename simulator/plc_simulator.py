@@ -0,0 +1,236 @@
+# Local simulator of the webvisu endpoint of a WAGO 750 (Codesys 2.3) PLC
+#
+# Serves the visu protocol used by wago_visu_client on /PLC/webvisu.htm:
+#   read:  POST "|0|<count>|0|<addr>|1|<addr>|...|"            -> "|<value>|<value>|...|"
+#   write: POST "|1|<count>|0|<addr>|<value>|1|<addr>|...|"    -> "|0|"
+# where <addr> is "RefId|Offset|size|type" as resolved from the SYM_XML file.
+# A GET of /PLC/webvisu.htm answers like the real visu page, so the config flow host check passes.
+#
+# The memory image is initialised with 0 for every variable of the given SYM_XML file;
+# addresses not in the file are accepted as well and created on first access.
+# Latency, jitter, lost requests and request-size limits are configurable, and
+# /sim/stats returns counters of the served traffic.
+#
+# Usage:
+#   python simulator/plc_simulator.py --sym example_config_files/PLC_Project.SYM_XML --port 8080
+#   python simulator/plc_simulator.py --sym ... --latency 0.05 --jitter 0.02 --loss 0.01 --max-addrs 100
+#
+# then configure the integration (or the benchmarks) with host "127.0.0.1:8080".
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_LOGGER = logging.getLogger("plc_simulator")
+
+VISU_PAGE = "<html><head><title>WebVisualization</title></head><body>Codesys webvisu (simulated)</body></html>"
+READ_FIELDS = 5   # index + 4 address fields
+WRITE_FIELDS = 6  # index + 4 address fields + value
+
+
+def load_symbol_index():
+    """Import symbol_index.py on its own - it only needs the standard library, not Home Assistant."""
+    spec = importlib.util.spec_from_file_location("wago_plc_symbol_index", ROOT / "symbol_index.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ProtocolError(Exception):
+    """Error to indicate a malformed visu request."""
+
+
+def parse_request(body: str) -> tuple[str, list[list[str]]]:
+    """Split a visu request into its kind ("0" read, "1" write) and the per-address fields."""
+    parts = body.strip().strip("|").split("|")
+    if len(parts) < 2 or parts[0] not in ("0", "1"):
+        raise ProtocolError(f"unknown request: {body[:50]}")
+
+    kind = parts[0]
+    try:
+        count = int(parts[1])
+    except ValueError as err:
+        raise ProtocolError(f"invalid count: {parts[1]}") from err
+
+    width = READ_FIELDS if kind == "0" else WRITE_FIELDS
+    fields = parts[2:]
+    if len(fields) != count * width:
+        raise ProtocolError(f"expected {count} entries, got {len(fields) / width:g}")
+
+    return kind, [fields[i:i + width] for i in range(0, len(fields), width)]
+
+
+class PLCSimulator:
+    """Memory image of a PLC and the aiohttp application serving it."""
+
+    def __init__(
+        self,
+        sym_file: str | None = None,
+        latency: float = 0.0,       # seconds added to every response
+        jitter: float = 0.0,        # +/- seconds of random variation of the latency
+        loss: float = 0.0,          # share of requests dropped without a response
+        max_addrs: int = 0,         # most addresses served in one request (0 = no limit)
+        max_bytes: int = 0,         # largest request body accepted (0 = no limit)
+        oversize: str = "truncate", # what happens to larger requests: "truncate" the reply or "error"
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.max_addrs = max_addrs
+        self.max_bytes = max_bytes
+        self.oversize = oversize
+        self._random = random.Random(seed)
+
+        self.memory: dict[str, str] = {}
+        self.names: dict[str, str] = {}  # variable name -> address
+        if sym_file:
+            self.load_sym_file(sym_file)
+
+        self.stats = {
+            "reads": 0, "writes": 0, "addresses_read": 0, "addresses_written": 0,
+            "bytes_in": 0, "bytes_out": 0, "dropped": 0, "oversized": 0, "errors": 0,
+        }
+        self._started = time.monotonic()
+
+    def load_sym_file(self, sym_file: str) -> None:
+        """Create a zeroed memory image of every variable the integration can address."""
+        symbol_index = load_symbol_index()
+        index = symbol_index.SymbolIndex.from_file(sym_file)
+        for name in index.vars:
+            resolved = index.resolve(name)
+            if "addr" in resolved:
+                self.names[name] = resolved["addr"]
+                self.memory.setdefault(resolved["addr"], "0")
+        _LOGGER.info("Loaded %d addressable variables from %s", len(self.names), sym_file)
+
+    def set_var(self, name_or_addr: str, value: Any) -> None:
+        """Set a variable by name (if loaded from the SYM file) or by address."""
+        self.memory[self.names.get(name_or_addr, name_or_addr)] = str(value)
+
+    def get_var(self, name_or_addr: str) -> str:
+        return self.memory.get(self.names.get(name_or_addr, name_or_addr), "0")
+
+    # --------------------------------------------------------------------
+    # Request handling
+    # --------------------------------------------------------------------
+
+    def handle_read(self, entries: list[list[str]]) -> str:
+        values = [self.memory.setdefault("|".join(entry[1:]), "0") for entry in entries]
+        self.stats["reads"] += 1
+        self.stats["addresses_read"] += len(values)
+        return "|" + "|".join(values) + "|"
+
+    def handle_write(self, entries: list[list[str]]) -> str:
+        for entry in entries:
+            self.memory["|".join(entry[1:5])] = entry[5]
+        self.stats["writes"] += 1
+        self.stats["addresses_written"] += len(entries)
+        return "|0|"
+
+    async def _delay(self) -> None:
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def handle_post(self, request: web.Request) -> web.StreamResponse:
+        body = await request.text()
+        self.stats["bytes_in"] += len(body)
+        await self._delay()
+
+        if self.loss and self._random.random() < self.loss:
+            # a lost request - the client sees the connection dropped
+            self.stats["dropped"] += 1
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response(status=500)
+
+        if self.max_bytes and len(body) > self.max_bytes:
+            self.stats["oversized"] += 1
+            return web.Response(status=413, text="Request too large")
+
+        try:
+            kind, entries = parse_request(body)
+        except ProtocolError as err:
+            self.stats["errors"] += 1
+            _LOGGER.warning("Bad request: %s", err)
+            return web.Response(status=400, text=str(err))
+
+        if self.max_addrs and len(entries) > self.max_addrs:
+            self.stats["oversized"] += 1
+            if self.oversize == "error":
+                return web.Response(status=500, text="Too many addresses")
+            # answer only the first addresses, as an overloaded visu would
+            entries = entries[:self.max_addrs]
+
+        text = self.handle_read(entries) if kind == "0" else self.handle_write(entries)
+        self.stats["bytes_out"] += len(text)
+        return web.Response(text=text)
+
+    async def handle_get(self, request: web.Request) -> web.Response:
+        return web.Response(text=VISU_PAGE, content_type="text/html")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        elapsed = time.monotonic() - self._started
+        stats = dict(self.stats, uptime=round(elapsed, 1), requests_per_second=round((self.stats["reads"] + self.stats["writes"]) / elapsed, 2) if elapsed else 0)
+        return web.json_response(stats)
+
+    async def handle_vars(self, request: web.Request) -> web.Response:
+        """GET /sim/vars?name=<var> reads a variable, POST /sim/vars {"name": value, ...} sets variables."""
+        if request.method == "POST":
+            for name, value in (await request.json()).items():
+                self.set_var(name, value)
+            return web.json_response({"ok": True})
+        name = request.query.get("name")
+        if name is None:
+            return web.json_response({name: self.memory.get(addr, "0") for name, addr in self.names.items()})
+        return web.json_response({name: self.get_var(name)})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/PLC/webvisu.htm", self.handle_get)
+        app.router.add_post("/PLC/webvisu.htm", self.handle_post)
+        app.router.add_get("/sim/stats", self.handle_stats)
+        app.router.add_get("/sim/vars", self.handle_vars)
+        app.router.add_post("/sim/vars", self.handle_vars)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> web.AppRunner:
+        """Serve the simulator in the running loop; call cleanup() on the returned runner to stop."""
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        _LOGGER.info("PLC simulator listening on http://%s:%d/PLC/webvisu.htm", host, port)
+        return runner
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate the webvisu endpoint of a WAGO PLC")
+    parser.add_argument("--sym", help="SYM_XML file to build the memory image from")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency variation")
+    parser.add_argument("--loss", type=float, default=0.0, help="share of requests dropped (0-1)")
+    parser.add_argument("--max-addrs", type=int, default=0, help="most addresses served per request (0 = no limit)")
+    parser.add_argument("--max-bytes", type=int, default=0, help="largest request body accepted (0 = no limit)")
+    parser.add_argument("--oversize", choices=["truncate", "error"], default="truncate", help="reply to requests over --max-addrs")
+    parser.add_argument("--seed", type=int, help="seed of the random latency and loss")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = PLCSimulator(args.sym, args.latency, args.jitter, args.loss, args.max_addrs, args.max_bytes, args.oversize, args.seed)
+    web.run_app(simulator.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
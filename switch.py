@@ -4,11 +4,12 @@ import logging
 from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, DEFAULT_COORDINATOR, CONF_ELEMENTS
+from .const import DOMAIN, CONF_ELEMENTS
 from .coordinator import IntegrationCoordinator
 
 from .generic_device import PLC_device
@@ -19,16 +20,23 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     
     full_elements = config_entry.options.get(CONF_ELEMENTS, [])
 
-    entities = [
+    entities = _entities_for(config_entry, full_elements)
+    # elements added or changed later are set up without reloading (see hot_reload.py)
+    config_entry.runtime_data.add_platform(Platform.SWITCH, _entities_for, async_add_entities)
+    async_add_entities(entities)
+
+
+def _entities_for(config_entry: ConfigEntry, elements: list[dict[str, Any]]) -> list[PLC_device]:
+    """Create the entities of the given elements handled by this platform."""
+    return [
       OnOffSwitch(
-          config_entry.runtime_data.coordinators[elem.get("coordinator_name", DEFAULT_COORDINATOR)], 
+          config_entry.runtime_data.coordinator_for(elem), 
           elem
       )
-      for elem in full_elements
+      for elem in elements
       if elem.get("device_type") == "SWITCH"
     ]
-    async_add_entities(entities)
-    
+
 
 class OnOffSwitch(PLC_device, SwitchEntity):
     # Implementation of an on/off switch.
@@ -43,7 +51,7 @@ class OnOffSwitch(PLC_device, SwitchEntity):
     def is_on(self) -> bool | None:
         """Return if the switch is on."""
         # This needs to enumerate to true or false
-        value = self._device.get("u_data_value")
+        value = self._value(self._data_slot)
         if value is None:
             return False
         return bool(int(value))
@@ -52,9 +60,7 @@ class OnOffSwitch(PLC_device, SwitchEntity):
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
         await self._write("u_data_addr_plc", 1)
-        await self.coordinator.async_refresh()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
-        await self._write("u_data_addr_plc", 0)
-        await self.coordinator.async_refresh()
\ No newline at end of file
+        await self._write("u_data_addr_plc", 0)
\ No newline at end of file
@@ -0,0 +1,483 @@
+# Index of the Codesys symbol table (SYM_XML) used to resolve PLC addresses
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections.abc import Iterable
+from typing import Any
+
+import xml.etree.ElementTree as ET
+
+_LOGGER = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".idx.json"
+READ_CHUNK = 64 * 1024  # characters fed to the parser at a time
+
+# --------------------------------------------------------------------
+# Mapping of PLC data types → visu_type / visu_size
+# --------------------------------------------------------------------
+DATA_TYPES = {
+    "BOOL": {"visu_type": 0, "visu_size": 1},
+    "INT": {"visu_type": 1, "visu_size": 2},
+    "WORD": {"visu_type": 1, "visu_size": 2},
+    "BYTE": {"visu_type": 2, "visu_size": 1},
+    "DINT": {"visu_type": 4, "visu_size": 4},
+    "DWORD": {"visu_type": 5, "visu_size": 4},
+    "REAL": {"visu_type" : 6, "visu_size": 4},
+    "TIME": {"visu_type": 7, "visu_size": 4},
+    "SINT": {"visu_type": 14, "visu_size": 1},
+    "USINT": {"visu_type": 15, "visu_size": 1},
+    "UINT": {"visu_type": 16, "visu_size": 2},
+    "UDINT": {"visu_type": 17, "visu_size": 4},
+    "DT": {"visu_type": 20, "visu_size": 4},
+}
+
+# a member (".name") or the indexes of an array element ("[1]", "[1,2]") in a variable name
+ACCESSOR = re.compile(r"\.([^.\[\]]+)|\[([^\[\]]+)\]")
+
+# in-process cache of loaded indexes: {sym_file_path: (sha256, SymbolIndex)}
+_LOADED: dict[str, tuple[str, "SymbolIndex"]] = {}
+
+
+def index_path(sym_file: str) -> str:
+    """Return the path of the index stored next to a SYM file."""
+    return sym_file + INDEX_SUFFIX
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_hash(path: str) -> str:
+    """Hash a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _add_layout(elem: ET.Element, type_id: str, layouts: dict[str, list]) -> None:
+    """Record the layout of a <TypeSimple>, <TypeUserdef> or <TypeArray>.
+
+    ["simple", type name, size]
+    ["struct", size, {member: [type id, offset in the structure]}]
+    ["array", size, [[lower, upper] per dimension], type id of the elements]
+    The base type of an array is often defined inline (without a TypeId) - it is
+    recorded under the id of the array with "/base" appended.
+    """
+    size = int(elem.attrib.get("Size", 0))
+    if elem.tag == "TypeSimple":
+        if elem.text:
+            layouts[type_id] = ["simple", elem.text, size]
+    elif elem.tag == "TypeUserdef":
+        layouts[type_id] = ["struct", size, {
+            var.text: [var.attrib.get("Type"), int(var.attrib.get("Offset", 0))] for var in elem.findall("Var") if var.text
+        }]
+    elif elem.tag == "TypeArray":
+        base = elem.find("BaseType")
+        dimensions = [[int(dim.attrib["Lower"]), int(dim.attrib["Upper"])] for dim in elem.findall("Dimension")]
+        if base is None or len(base) == 0 or not dimensions:
+            return
+        _add_layout(base[0], type_id + "/base", layouts)
+        layouts[type_id] = ["array", size, dimensions, type_id + "/base"]
+
+
+class SymbolFileError(Exception):
+    """Error to indicate the symbol file is not a valid Codesys symbol table.
+
+    'reason' is the error key shown by the options flow.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class SymbolIndex:
+    """Pre-resolved symbol table: variable name → (RefId, Offset, TypeId, type name, size).
+
+    Built once per SYM file and stored next to it as JSON, validated by the hash
+    of the SYM file, so option flows and restarts do not parse the XML again.
+
+    Next to the variables it keeps the layouts of the types ('types' - structures,
+    function blocks and arrays with the offsets of their members) and the top-level
+    variables of those types ('tops' - name → (RefId, Offset, TypeId)), so members
+    and array elements which are not exported one by one are addressed too, e.g.
+    "PLC_PRG.Light_1.auto_off_delay" or "ReadClock.Holidays[3].DAY".
+    """
+
+    __slots__ = ("vars", "types", "tops", "_resolved")
+
+    def __init__(
+        self,
+        vars: dict[str, tuple[str, str, str, str | None, int | None]],
+        types: dict[str, list] | None = None,
+        tops: dict[str, tuple[str, str, str]] | None = None,
+    ) -> None:
+        self.vars = vars
+        self.types = types or {}
+        self.tops = tops or {}
+        self._resolved: dict[str, dict[str, str]] = {}  # results of resolve_many, kept with the index
+
+    def __len__(self) -> int:
+        return len(self.vars)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.vars
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[str]) -> "SymbolIndex":
+        """Build the index by streaming over a CoDeSysSymbolTable (blocking).
+
+        The document is never held as a tree - every <TypeSimple> and <Var> is
+        dropped as soon as it was indexed, so memory use depends on the number of
+        variables only. Raises ET.ParseError or SymbolFileError.
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        path: list[str] = []  # tags of the currently open elements
+        containers: list[ET.Element] = []
+
+        types: dict[str, tuple[str, int]] = {}  # {"0" : ("BOOL", 1), "3" : ("BYTE", 1)...
+        layouts: dict[str, list] = {}           # see _add_layout
+        raw_vars: dict[str, tuple[str, str, str]] = {}
+        top_types: dict[str, str] = {}          # {variable name: TopLevelType} of members of structures / arrays
+        has_var_list = False
+
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if not path and elem.tag != "CoDeSysSymbolTable":
+                        raise SymbolFileError("CoDeSysSymbolTable_missing")
+                    path.append(elem.tag)
+                    containers.append(elem)
+                    if len(path) == 2 and elem.tag == "SymbolVarList":
+                        has_var_list = True
+                    continue
+
+                path.pop()
+                containers.pop()
+                parent = path[-1] if path else None
+
+                if parent == "SymbolTypeList" and elem.tag in ("TypeSimple", "TypeUserdef", "TypeArray"):
+                    if elem.tag == "TypeSimple" and elem.text:
+                        types[elem.attrib["TypeId"]] = (elem.text, int(elem.attrib.get("Size", 0)))
+                    if "TypeId" in elem.attrib:
+                        _add_layout(elem, elem.attrib["TypeId"], layouts)
+                elif parent == "SymbolVarList" and elem.tag == "Var":
+                    # example <Var Type="102" Flags="33554464" Access="98" RefId="2" Offset="112">.OUT1</Var>
+                    if elem.text:
+                        raw_vars[elem.text] = (elem.attrib.get("RefId", ""), elem.attrib.get("Offset", ""), elem.attrib.get("Type"))
+                        if "TopLevelType" in elem.attrib:
+                            top_types[elem.text] = elem.attrib["TopLevelType"]
+                else:
+                    continue
+
+                # everything needed is indexed - drop the processed nodes
+                containers[-1].clear()
+
+        parser.close()
+
+        if not has_var_list:
+            raise SymbolFileError("SymbolVarList_missing")
+        if not raw_vars:
+            raise SymbolFileError("Var_missing")
+
+        vars = {}
+        for name, (ref_id, offset, type_id) in raw_vars.items():
+            type_name, size = types.get(type_id, (None, None))
+            vars[name] = (ref_id, offset, type_id, type_name, size)
+        index = cls(vars, layouts)
+        index._find_top_levels(top_types)
+        return index
+
+    def _find_top_levels(self, top_types: dict[str, str]) -> None:
+        """Find the top-level variables (instances, structures, arrays) of the exported members.
+
+        The SYM file lists the members with their 'TopLevelType', but not the variable
+        itself - its offset is the offset of a member less the member's place in the type.
+        """
+        for name, top_type in top_types.items():
+            if top_type not in self.types:
+                continue
+            ref_id, offset, type_id = self.vars[name][:3]
+            for match in re.finditer(r"[.\[]", name):
+                prefix = name[:match.start()]
+                if not prefix:
+                    continue  # global variables start with "."
+                if prefix in self.tops:
+                    break
+                located = self._member(top_type, name[match.start():], 0)
+                if located is not None and self._same_type(located[0], type_id):
+                    self.tops[prefix] = (ref_id, str(int(offset) - located[1]), top_type)
+                    break
+
+    def _same_type(self, type_id: str, other_id: str) -> bool:
+        """Return True for the same type - also an inline "<id>/base" type and the TypeSimple it repeats."""
+        if type_id == other_id:
+            return True
+        layout = self.types.get(type_id)
+        return layout is not None and layout[0] == "simple" and layout == self.types.get(other_id)
+
+    def _member(self, type_id: str, accessors: str, offset: int) -> tuple[str, int] | None:
+        """Follow members and array indexes (e.g. ".timer.PT" or "[2,1].DAY") through the type layouts.
+
+        Returns (TypeId, offset) of the addressed member, or None if the type has no such member.
+        """
+        position = 0
+        while position < len(accessors):
+            match = ACCESSOR.match(accessors, position)
+            layout = self.types.get(type_id)
+            if match is None or layout is None:
+                return None
+            position = match.end()
+            member, indexes = match.groups()
+
+            if member is not None:
+                if layout[0] != "struct" or member not in layout[2]:
+                    return None
+                type_id, member_offset = layout[2][member]
+                offset += member_offset
+                continue
+
+            if layout[0] != "array":
+                return None
+            try:
+                values = [int(value) for value in indexes.split(",")]
+            except ValueError:
+                return None
+            dimensions = layout[2]
+            if len(values) != len(dimensions):
+                return None
+            # row-major - the last index changes fastest
+            element, count = 0, 1
+            for value, (lower, upper) in zip(values, dimensions):
+                if not lower <= value <= upper:
+                    return None
+                element = element * (upper - lower + 1) + value - lower
+                count *= upper - lower + 1
+            offset += element * (layout[1] // count)
+            type_id = layout[3]
+
+        return type_id, offset
+
+    def _locate(self, name: str) -> tuple[str, str, str] | None:
+        """Return (RefId, Offset, TypeId) of a member or array element of a known variable."""
+        for match in reversed(list(re.finditer(r"[.\[]", name))):
+            prefix = name[:match.start()]
+            if prefix in self.tops:
+                ref_id, offset, type_id = self.tops[prefix]
+            elif prefix in self.vars:
+                ref_id, offset, type_id = self.vars[prefix][:3]
+            else:
+                continue
+            located = self._member(type_id, name[match.start():], int(offset))
+            if located is not None:
+                return ref_id, str(located[1]), located[0]
+        return None
+
+    @classmethod
+    def from_string(cls, xml_content: str) -> "SymbolIndex":
+        """Build the index from the contents of a SYM file (blocking)."""
+        return cls.from_chunks(xml_content[i:i + READ_CHUNK] for i in range(0, len(xml_content), READ_CHUNK))
+
+    @classmethod
+    def from_file(cls, sym_file: str) -> "SymbolIndex":
+        """Build the index from a stored SYM file (blocking).
+
+        The options flow stores the uploaded SYM file as utf-8 (whatever its XML
+        declaration says), so it is read back the same way.
+        """
+        with open(sym_file, encoding="utf-8") as f:
+            return cls.from_chunks(iter(lambda: f.read(READ_CHUNK), ""))
+
+    # So if addr would be for example "PLC_PRG.Control_B_1PP2.T_UP"
+    #
+    # the index holds the variable found in the symbol file generated by codesys, for example
+    # "<Var Type="4" Flags="1073741825" Access="98" RefId="3" Offset="5644" TopLevelType="57">PLC_PRG.Control_B_1PP2.T_UP</Var>"
+    # together with the name of its type, for example "<TypeSimple TypeId="4" Size="4">TIME</TypeSimple>"
+    #
+    # and as a result, the function returns an addressed to be used in communication with the PLC via webvisu:
+    # RefId=3, Offset=5644, size=4, type=7 (size and type from the DATA_TYPES, as defined by "TIME")
+    # "3|5644|4|7"
+    #
+    # Members which are not exported are found through the layout of their top-level variable,
+    # e.g. "PLC_PRG.Control_B_1PP2.T_UP" is at the offset of "PLC_PRG.Control_B_1PP2" plus the
+    # offset of T_UP in the function block type.
+
+    def resolve(self, addr: str) -> dict[str, str]:
+        """Return {"addr": webvisu address} or {"error": message} for a variable name."""
+        if addr in self.vars:
+            ref_id, offset, type_id, type_name, _ = self.vars[addr]
+        elif addr in self.tops:
+            ref_id, offset, type_id = self.tops[addr]
+            type_name = None
+        elif (located := self._locate(addr)) is not None:
+            ref_id, offset, type_id = located
+            layout = self.types.get(type_id)
+            type_name = layout[1] if layout is not None and layout[0] == "simple" else None
+        else:
+            return {"error" : f"Address '{addr}' not found in symbol file."}
+
+        if type_name is None and self.types.get(type_id, ["simple"])[0] != "simple":
+            return {"error" : f"Address '{addr}' is a structure or an array - use one of its members."}
+
+        if type_name is None:
+            return {"error" : f"Var type '{type_id}' not defined in symbol file."}
+
+        if type_name not in DATA_TYPES:
+            return {"error" :  f"Var type '{type_name}' for not defined in data conversion table."}
+
+        visu_type = DATA_TYPES[type_name]["visu_type"]
+
+        if type_name == "BOOL":
+            visu_size = 0 if ref_id in ("1", "2") else 1
+        else:
+            visu_size = DATA_TYPES[type_name]["visu_size"]
+
+        return {"addr" : f"{ref_id}|{offset}|{visu_size}|{visu_type}"}
+
+    def resolve_many(self, names: Iterable[str]) -> dict[str, dict[str, str]]:
+        """Resolve many variable names at once - each name is resolved only once per index."""
+        resolved = self._resolved
+        for name in names:
+            if name not in resolved:
+                resolved[name] = self.resolve(name)
+        return resolved
+
+    # --------------------------------------------------------------------
+    # Persistence of the index next to the SYM file
+    # --------------------------------------------------------------------
+
+    def save(self, sym_file: str, sym_hash: str) -> None:
+        """Store the index next to the SYM file (blocking)."""
+        content = {"version": INDEX_VERSION, "sha256": sym_hash, "vars": self.vars, "types": self.types, "tops": self.tops}
+        tmp_path = index_path(sym_file) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, separators=(",", ":"))
+        os.replace(tmp_path, index_path(sym_file))
+        _LOADED[sym_file] = (sym_hash, self)
+
+    @classmethod
+    def _load_stored(cls, sym_file: str, sym_hash: str) -> "SymbolIndex | None":
+        try:
+            with open(index_path(sym_file), encoding="utf-8") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if content.get("version") != INDEX_VERSION or content.get("sha256") != sym_hash:
+            _LOGGER.debug("Stored symbol index of %s is outdated", sym_file)
+            return None
+
+        return cls(
+            {name: tuple(entry) for name, entry in content["vars"].items()},
+            content.get("types", {}),
+            {name: tuple(entry) for name, entry in content.get("tops", {}).items()},
+        )
+
+    @classmethod
+    def load(cls, sym_file: str) -> "SymbolIndex":
+        """Return the index of a stored SYM file (blocking - run it in the executor).
+
+        Uses the in-process cache or the stored index when they match the file hash,
+        otherwise parses the SYM file and stores a fresh index.
+        """
+        sym_hash = _file_hash(sym_file)
+
+        cached = _LOADED.get(sym_file)
+        if cached and cached[0] == sym_hash:
+            return cached[1]
+
+        index = cls._load_stored(sym_file, sym_hash)
+        if index is None:
+            _LOGGER.info("Building symbol index for %s", sym_file)
+            index = cls.from_file(sym_file)
+            try:
+                index.save(sym_file, sym_hash)
+            except OSError as err:
+                _LOGGER.warning("Failed to store symbol index for %s: %s", sym_file, err)
+
+        _LOADED[sym_file] = (sym_hash, index)
+        return index
+
+
+# --------------------------------------------------------------------
+# Resolution of element addresses - plain synchronous functions, so the
+# options flow can run them in the executor instead of the event loop
+# --------------------------------------------------------------------
+
+def _variable_names(elements: list[dict[str, Any]]) -> set[str]:
+    """Return the distinct variable names used by the '*_addr' attributes of the elements."""
+    return {value for element in elements for key, value in element.items() if key.endswith("_addr") and isinstance(value, str)}
+
+
+def resolve_elements(elements: list[dict[str, Any]], index: SymbolIndex) -> list[str]:
+    """Assign '<key>_plc' webvisu addresses to every '*_addr' of new elements.
+
+    Every variable is looked up once, however many elements use it, and all
+    elements are checked - the elements are updated in place (where their
+    addresses resolve) and all errors found are returned (an empty list if none).
+    """
+    # the attributes ending with "_addr" of every element, found once
+    addr_keys = [[key for key in element if key.endswith("_addr")] for element in elements]
+    resolved = index.resolve_many({element[key] for element, keys in zip(elements, addr_keys) for key in keys if isinstance(element[key], str)})
+
+    errors: list[str] = []
+    for element, keys in zip(elements, addr_keys):
+        element_id = element.get("device_id", "Unknown")
+
+        # 1) Check if element has at least 1 attribute starting with "u_"
+        if not any(key.startswith("u_") for key in keys):
+            errors.append(f"Element '{element_id}' must have at least one 'u_XXXX_addr' attribute")
+            continue
+
+        # 2) Check all attributes of the element ending with "_addr"
+        for addr_key in keys:
+            name = element[addr_key]
+            if not isinstance(name, str):
+                errors.append(f"Variable: {element_id}: '{addr_key}' must be a variable name")
+                continue
+            addr_check = resolved[name]
+            if "error" in addr_check:
+                errors.append(f"Variable: {element_id}: " + addr_check["error"])
+                continue
+            element[addr_key + "_plc"] = addr_check["addr"] # assign the PLC address to a new attribute
+
+    return errors
+
+
+def remap_elements(elements: list[dict[str, Any]], index: SymbolIndex) -> tuple[list[tuple[int, str, str | None]], list[str]]:
+    """Resolve the addresses of configured elements against a new SYM file.
+
+    The elements are not modified (they are in use by the coordinators) - instead
+    a list of (element position, '<key>_plc', new address or None to delete) is
+    returned together with the errors found.
+    """
+    resolved = index.resolve_many(_variable_names(elements))
+
+    updates: list[tuple[int, str, str | None]] = []
+    errors: list[str] = []
+    for position, element in enumerate(elements):
+        for addr_key in [k for k in element if k.endswith("_addr") and isinstance(element[k], str)]:
+            addr_check = resolved[element[addr_key]]
+            if "error" in addr_check:
+                errors.append(f"Device - {element.get('device_id', 'Unknown')}: " + addr_check["error"])
+                if addr_key + "_plc" in element:
+                    updates.append((position, addr_key + "_plc", None))
+            else:
+                updates.append((position, addr_key + "_plc", addr_check["addr"]))
+    return updates, errors
+
+
+def remove_index(sym_file: str) -> None:
+    """Delete the stored index of a SYM file (blocking)."""
+    _LOADED.pop(sym_file, None)
+    try:
+        os.remove(index_path(sym_file))
+    except FileNotFoundError:
+        pass
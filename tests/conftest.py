@@ -0,0 +1,15 @@
+# The repository is the 'wago_plc' package (it uses relative imports).
+# It is registered without running __init__.py, so the modules which do not
+# need Home Assistant can be tested on their own.
+
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "wago_plc"
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(ROOT)]
+    sys.modules[PACKAGE] = package
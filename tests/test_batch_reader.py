@@ -0,0 +1,58 @@
+# Chunked reads (batch_reader.py)
+
+import asyncio
+
+import pytest
+
+from wago_plc.batch_reader import BatchReader, ResponseMismatch
+
+
+class StubPLC:
+    """Stand-in for WagoPLC answering "<address>=" for every address, short for the 'short' chunks."""
+
+    def __init__(self, short: set[str] = frozenset()) -> None:
+        self.short = short  # first addresses of the chunks answered with a value missing
+        self.requests: list[list[str]] = []
+
+    async def get_data(self, addrs: list[str]) -> list[str]:
+        self.requests.append(addrs)
+        await asyncio.sleep(0)
+        values = [f"{addr}=" for addr in addrs]
+        return values[:-1] if addrs[0] in self.short else values
+
+
+ADDRS = [f"a{i}" for i in range(7)]
+
+
+def test_read_in_chunks_keeps_order():
+    reader = BatchReader(StubPLC(), chunk_size=3, concurrency=2)
+
+    assert asyncio.run(reader.read(ADDRS)) == [f"{addr}=" for addr in ADDRS]
+    assert reader.requests == 3
+
+
+def test_mismatched_chunk_leaves_none_for_its_addresses():
+    api = StubPLC(short={"a3"})
+    reader = BatchReader(api, chunk_size=3, concurrency=2)
+
+    values = asyncio.run(reader.read(ADDRS))
+
+    assert values == ["a0=", "a1=", "a2=", None, None, None, "a6="]
+    assert reader.mismatched_chunks == 1
+    assert reader.failed_chunks == 0
+
+
+def test_all_chunks_mismatched_fails_the_read():
+    api = StubPLC(short={"a0", "a3", "a6"})
+    reader = BatchReader(api, chunk_size=3, concurrency=2)
+
+    with pytest.raises(ResponseMismatch):
+        asyncio.run(reader.read(ADDRS))
+    assert reader.mismatched_chunks == 3
+
+
+def test_single_chunk_mismatch_fails_the_read():
+    reader = BatchReader(StubPLC(short={"a0"}), chunk_size=10)
+
+    with pytest.raises(ResponseMismatch):
+        asyncio.run(reader.read(ADDRS))
@@ -0,0 +1,26 @@
+# Validation of pasted elements (config_flow.py)
+
+from wago_plc.config_flow import validate_elements
+
+
+def test_duplicate_device_ids_in_submitted_elements():
+    data = [
+        {"device_id": 1, "device_type": "LIGHT"},
+        {"device_id": 2, "device_type": "SWITCH"},
+        {"device_id": 1, "device_type": "SWITCH"},
+        # settings entities share the device_id of their device
+        {"device_id": 2, "entity_name": "delay", "device_type": "NUMBER"},
+    ]
+
+    assert validate_elements(data, set()) == ["Device_id 1 is used by more than one element"]
+
+
+def test_device_ids_already_used():
+    data = [{"device_id": 1, "device_type": "LIGHT"}, {"device_id": 5, "device_type": "LIGHT"}, {"device_id": 7, "device_type": "LIGHT"}]
+
+    assert validate_elements(data, other_ids={5}, existing_ids={1, 2}) == [
+        "Device_id 1 is already used by a device of this PLC",
+        "Device_id 5 is already used by another PLC",
+    ]
+    # when replacing the elements, the ids of this PLC are free
+    assert validate_elements(data, other_ids=set()) == []
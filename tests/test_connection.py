@@ -0,0 +1,76 @@
+# Circuit breaker (connection.py) together with the chunked reads (batch_reader.py)
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from wago_plc.batch_reader import BatchReader
+from wago_plc.connection import STATE_CLOSED, STATE_OPEN, CircuitOpenError, PLCConnection
+
+
+class StubPLC:
+    """Stand-in for wago_visu_client.WagoPLC answering every read."""
+
+    def __init__(self) -> None:
+        self.host = "stub"
+        self.session = None
+        self.reads = 0
+
+    async def get_data(self, addrs: list[str]) -> list[str]:
+        self.reads += 1
+        await asyncio.sleep(0)
+        return ["1"] * len(addrs)
+
+
+def recovering_connection(probe_result: bool) -> tuple[PLCConnection, StubPLC, list[int]]:
+    """Connection whose circuit is open and due for a probe answering 'probe_result'."""
+    api = StubPLC()
+    connection = PLCConnection(api)
+    connection.state = STATE_OPEN
+    connection._backoff = 5
+    connection.retry_at = asyncio.get_running_loop().time() - 1
+    probes = []
+
+    async def probe() -> bool:
+        probes.append(1)
+        await asyncio.sleep(0.01)
+        return probe_result
+
+    connection._async_probe = probe
+    return connection, api, probes
+
+
+def test_multi_chunk_read_after_recovery():
+    """All chunks of the first read wait for the probe and read fresh values."""
+    async def run() -> None:
+        connection, api, probes = recovering_connection(True)
+        reader = BatchReader(connection, chunk_size=2, concurrency=4)
+
+        values = await reader.read([f"addr{i}" for i in range(7)])
+
+        assert values == ["1"] * 7
+        assert len(probes) == 1
+        assert api.reads == 4
+        assert reader.failed_chunks == 0
+        assert connection.state == STATE_CLOSED
+        assert connection.rejected == 0
+
+    asyncio.run(run())
+
+
+def test_multi_chunk_read_failed_probe():
+    """When the probe fails, the whole read fails instead of returning some chunks."""
+    async def run() -> None:
+        connection, api, probes = recovering_connection(False)
+        reader = BatchReader(connection, chunk_size=2, concurrency=4)
+
+        with pytest.raises(CircuitOpenError):
+            await reader.read([f"addr{i}" for i in range(7)])
+
+        assert len(probes) == 1
+        assert api.reads == 0
+        assert connection.state == STATE_OPEN
+        assert connection.rejected == 4
+
+    asyncio.run(run())
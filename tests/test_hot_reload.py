@@ -0,0 +1,46 @@
+# Comparing element lists for hot reloads (hot_reload.py)
+
+from wago_plc.hot_reload import ElementsDiff, diff_elements, only_elements_changed
+
+OLD = [
+    {"device_id": 1, "device_type": "LIGHT", "name": "Kitchen", "u_state_addr": "PLC_PRG.Light_Kuchnia.Q", "u_state_addr_plc": "3|100|1|0"},
+    {"device_id": 1, "entity_name": "delay", "device_type": "NUMBER", "u_state_addr": "PLC_PRG.Light_Kuchnia.auto_off_delay"},
+    {"device_id": 2, "device_type": "SWITCH", "name": "Pump", "u_state_addr": "PLC_PRG.Hydrofor.Q"},
+    {"device_id": 3, "device_type": "SENSOR", "name": "Hour", "u_state_addr": "PLC_PRG.Current_Hour"},
+]
+
+
+def test_diff_classifies_devices():
+    new = [
+        # unchanged - also when earlier versions stored a value read from the PLC
+        dict(OLD[0], u_state_value="1"),
+        # a setting of device 1 changed - the whole device changed
+        dict(OLD[1], u_state_addr="PLC_PRG.Light_Kuchnia.auto_off_after_move_delay"),
+        # device 2 removed, device 3 unchanged, device 4 added
+        OLD[3],
+        {"device_id": 4, "device_type": "SWITCH", "name": "Fan", "u_state_addr": "PLC_PRG.Wentylator.Q"},
+    ]
+
+    assert diff_elements(OLD, new) == ElementsDiff(added={4}, removed={2}, changed={1})
+
+
+def test_diff_of_new_address_or_poll_interval():
+    new = [dict(elem) for elem in OLD]
+    new[0]["u_state_addr_plc"] = "3|104|1|0"  # a new SYM file moved the variable
+    new[3]["poll_interval"] = 0.5
+
+    assert diff_elements(OLD, new) == ElementsDiff(changed={1, 3})
+
+
+def test_no_diff():
+    diff = diff_elements(OLD, [dict(elem) for elem in OLD])
+
+    assert diff == ElementsDiff()
+    assert not diff
+
+
+def test_only_elements_changed():
+    old = {"elements": OLD, "sym_file": "a.xml", "scan_interval": 3}
+
+    assert only_elements_changed(old, {"elements": OLD[:2], "sym_file": "b.xml", "scan_interval": 3})
+    assert not only_elements_changed(old, {"elements": OLD, "sym_file": "a.xml", "scan_interval": 5})
@@ -0,0 +1,79 @@
+# Poll grid and merging of due groups (poll_scheduler.py)
+
+from types import SimpleNamespace
+
+import pytest
+
+from wago_plc.poll_scheduler import PollScheduler
+
+
+class FakeLoop:
+    """Loop clock set by the test; call_at only records the time of the next tick."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+        self.scheduled: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def call_at(self, when: float, callback) -> SimpleNamespace:
+        self.scheduled.append(when)
+        return SimpleNamespace(cancel=lambda: None)
+
+
+def coordinator(group_name: str, poll_interval: float) -> SimpleNamespace:
+    return SimpleNamespace(group_name=group_name, poll_interval=poll_interval, active_devices={})
+
+
+def scheduler_with(*groups: SimpleNamespace, now: float = 0.0, phase: float = 0.0) -> PollScheduler:
+    loop = FakeLoop(now)
+    scheduler = PollScheduler(SimpleNamespace(loop=loop), reader=None, motion_interval=0)
+    scheduler.phase = phase
+    for group in groups:
+        scheduler.add(group)
+    return scheduler
+
+
+def test_next_slot_on_the_grid_shifted_by_phase():
+    # the phase is a share of the shortest interval of the PLC (1 s)
+    scheduler = scheduler_with(coordinator("fast", 1), coordinator("slow", 10), phase=0.25)
+
+    assert scheduler._next_slot(3.0, 1) == pytest.approx(3.25)
+    assert scheduler._next_slot(3.25, 1) == pytest.approx(4.25)  # strictly later
+    assert scheduler._next_slot(3.0, 10) == pytest.approx(10.25)
+    assert scheduler._next_slot(10.25, 10) == pytest.approx(20.25)
+
+    # without a phase the grid starts at 0
+    assert scheduler_with(coordinator("fast", 1))._next_slot(3.0, 1) == pytest.approx(4.0)
+
+
+def test_start_aligns_groups_to_the_grid():
+    fast, slow, settings = coordinator("fast", 1), coordinator("slow", 10), coordinator("settings", 86400)
+    scheduler = scheduler_with(fast, slow, settings, now=3.0, phase=0.25)
+
+    scheduler.async_start({"settings": 0})
+
+    # first slot at least half an interval after the start
+    assert scheduler._due["fast"] == pytest.approx(4.25)
+    assert scheduler._due["slow"] == pytest.approx(10.25)
+    assert scheduler._due["settings"] == pytest.approx(3.0)
+    assert scheduler.hass.loop.scheduled[-1] == pytest.approx(3.0)
+
+
+def test_groups_almost_due_are_read_along():
+    fast, slow, hourly = coordinator("fast", 1), coordinator("slow", 10), coordinator("hourly", 60)
+    scheduler = scheduler_with(fast, slow, hourly, phase=0.25)
+    scheduler._due = {"fast": 5.25, "slow": 7.0, "hourly": 100.0}
+
+    # 'slow' is due within a quarter of its interval, 'hourly' is not
+    assert scheduler._due_groups(5.25) == [fast, slow]
+    assert scheduler._due["fast"] == pytest.approx(6.25)
+    assert scheduler._due["slow"] == pytest.approx(10.25)
+    assert scheduler._due["hourly"] == 100.0
+
+    # a requested group is read out of its turn and stays on its grid
+    scheduler._requested.add("hourly")
+    assert scheduler._due_groups(6.25) == [fast, hourly]
+    assert scheduler._due["hourly"] == 100.0
+    assert not scheduler._requested
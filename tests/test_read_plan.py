@@ -0,0 +1,67 @@
+# Compiled read plans (read_plan.py)
+
+from wago_plc.read_plan import ReadPlan, ValueTable
+
+ELEMENTS = [
+    {"device_id": 1, "device_type": "LIGHT", "u_state_addr_plc": "3|91|1|0", "u_auto_off_addr_plc": "3|93|1|0"},
+    # a second light reading the same state variable
+    {"device_id": 2, "device_type": "LIGHT", "u_state_addr_plc": "3|91|1|0"},
+    # a setting of device 1, sharing its device_id
+    {"device_id": 1, "entity_name": "delay", "device_type": "NUMBER", "u_state_addr_plc": "3|96|2|1"},
+    {"device_id": 3, "device_type": "SENSOR", "u_state_addr_plc": "4|24332|2|1", "coordinator_name": "hourly"},
+    {"device_id": 4, "device_type": "SENSOR", "u_state_addr_plc": "4|100|2|1", "poll_interval": 0.5},
+]
+
+
+def test_compile_reads_each_address_once():
+    plan = ReadPlan.compile(ELEMENTS, "live")
+
+    assert plan.addrs == ["3|91|1|0", "3|93|1|0", "3|96|2|1"]
+    assert plan.devices == [(1, 2), (1,), (1,)]
+    assert len(plan.table) == 3
+    assert [element.device_id for element in plan.elements] == [1, 2, 1]
+
+    assert ReadPlan.compile(ELEMENTS, "hourly").addrs == ["4|24332|2|1"]
+    assert ReadPlan.compile(ELEMENTS, "0.5s").addrs == ["4|100|2|1"]
+
+
+def test_scatter_to_every_element_of_an_address():
+    table = ValueTable()
+    plan = ReadPlan.compile(ELEMENTS, "live", table)
+    first, second, setting = plan.elements
+
+    assert plan.scatter(["1", "0", "30"]) == {1, 2}
+    assert table.values[first.slot("u_state_value")] == "1"
+    assert table.values[second.slot("u_state_value")] == "1"
+    assert table.values[first.slot("u_auto_off_value")] == "0"
+    assert table.values[setting.slot("u_state_value")] == "30"
+
+    # only devices reading a changed address are reported
+    assert plan.scatter(["1", "1", "30"]) == {1}
+    assert plan.scatter(["0", "1", "30"]) == {1, 2}
+    assert plan.scatter(["0", "1", "30"]) == set()
+
+    # values of chunks which could not be read are kept
+    assert plan.scatter([None, None, "45"]) == {1}
+    assert table.values[second.slot("u_state_value")] == "0"
+
+
+def test_subset_of_changed_devices():
+    table = ValueTable()
+    plan = ReadPlan.compile(ELEMENTS, "live", table)
+
+    subset = plan.subset([2])
+    assert subset.addrs == ["3|91|1|0"]
+    assert subset.devices == [(1, 2)]
+    assert [element.device_id for element in subset.elements] == [1, 2, 1]
+
+    subset = plan.subset([1])
+    assert subset.addrs == plan.addrs
+
+    subset = plan.subset([], ["3|96|2|1", "9|9|9|9"])
+    assert subset.addrs == ["3|96|2|1"]
+    assert plan.subset([5]).addrs == []
+
+    # a subset writes into the same value table
+    assert subset.scatter(["30"]) == {1}
+    assert table.values[plan.slots[2]] == "30"
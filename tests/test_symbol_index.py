@@ -0,0 +1,88 @@
+# Symbol table index and address resolution (symbol_index.py)
+
+from pathlib import Path
+
+import pytest
+
+from wago_plc.symbol_index import SymbolIndex
+
+SYM_FILE = Path(__file__).resolve().parent.parent / "example_config_files" / "PLC_Project.SYM_XML"
+
+
+def test_from_file_reads_stored_sym_file_like_upload(tmp_path):
+    """The index rebuilt from the stored file resolves the same (non-ASCII) names as at upload."""
+    text = SYM_FILE.read_text(encoding="iso-8859-1").replace("PLC_PRG.Heating_switch<", "PLC_PRG.Światło<")
+    path = tmp_path / "project.xml"
+    path.write_text(text, encoding="utf-8")  # as the options flow stores it
+
+    uploaded = SymbolIndex.from_string(text)
+    stored = SymbolIndex.from_file(str(path))
+
+    assert stored.vars == uploaded.vars
+    assert stored.resolve("PLC_PRG.Światło") == uploaded.resolve("PLC_PRG.Światło") == {"addr": "3|2288|1|0"}
+
+
+@pytest.fixture(scope="module")
+def index() -> SymbolIndex:
+    return SymbolIndex.from_file(str(SYM_FILE))
+
+
+def test_member_of_struct_not_exported(index):
+    """Members missing from the SymbolVarList are found through the layout of their top-level variable."""
+    assert "PLC_PRG.Light_Kuchnia.external" not in index
+    assert index.resolve("PLC_PRG.Light_Kuchnia.external") == {"addr": "3|86|2|1"}
+    # member of a function block inside a function block: 4 (click_filter_tof) + 12 (PT)
+    assert index.resolve("PLC_PRG.Light_Kuchnia.click_filter_tof.PT") == {"addr": "3|16|4|7"}
+
+
+def test_array_of_two_dimensions(index):
+    """Elements of ARRAY[1..3, 1..7] OF STRING(10) - row-major, 11 bytes each."""
+    assert index.tops[".LANGUAGE"] == ("4", "26604", "56")
+    # WEEKDAYS is at 4 in CONSTANTS_LANGUAGE
+    assert index._locate(".LANGUAGE.WEEKDAYS[1,1]") == ("4", "26608", "49/base")
+    assert index._locate(".LANGUAGE.WEEKDAYS[1,7]") == ("4", "26674", "49/base")
+    assert index._locate(".LANGUAGE.WEEKDAYS[2,1]") == ("4", "26685", "49/base")
+    assert index._locate(".LANGUAGE.WEEKDAYS[2,3]") == ("4", "26707", "49/base")
+
+    # the same offsets as the elements exported by Codesys
+    exported = [name for name in index.vars if name.startswith(".LANGUAGE.") and "," in name]
+    assert exported
+    for name in exported:
+        assert index._locate(name)[:2] == index.vars[name][:2], name
+
+
+def test_array_of_inline_base_type(index):
+    """Arrays whose base type is defined inline, not under a TypeId of its own."""
+    assert index.types["41"] == ["array", 64, [[0, 63]], "41/base"]
+    assert index._locate(".BASE64_CHAR_TABLE[5]") == ("4", "26269", "41/base")
+    # ARRAY[43..122] OF BYTE starts with element 43
+    assert index._locate(".BASE64_DECODE_TABLE[43]") == ("4", "26328", "42/base")
+    # ARRAY[0..29] OF HOLIDAY_DATA: 24676 + 3 * 36 + 31
+    assert index._locate("ReadClock.Holidays[3].DAY") == ("4", "24815", "8")
+
+    exported = [name for name in index.vars if name.startswith((".BASE64_CHAR_TABLE[", ".BASE64_DECODE_TABLE[", "ReadClock.Holidays["))]
+    assert exported
+    for name in exported:
+        assert index._locate(name)[:2] == index.vars[name][:2], name
+
+    # without the exported element, resolved through the layout with the type name of the inline BYTE
+    stripped = SymbolIndex({name: entry for name, entry in index.vars.items() if name != ".BASE64_CHAR_TABLE[5]"}, index.types, index.tops)
+    assert stripped.resolve(".BASE64_CHAR_TABLE[5]") == {"addr": "4|26269|1|2"}
+
+
+def test_index_out_of_bounds_is_rejected(index):
+    for name in (
+        ".BASE64_CHAR_TABLE[64]",
+        ".BASE64_DECODE_TABLE[42]",
+        "ReadClock.Holidays[30].DAY",
+        ".LANGUAGE.WEEKDAYS[4,1]",
+        ".LANGUAGE.WEEKDAYS[1,8]",
+        ".LANGUAGE.WEEKDAYS[1]",
+    ):
+        assert index._locate(name) is None, name
+        assert index.resolve(name) == {"error": f"Address '{name}' not found in symbol file."}
+
+
+def test_structure_or_array_is_rejected(index):
+    for name in ("PLC_PRG.Light_Kuchnia", "PLC_PRG.Light_Kuchnia.click_filter_tof", "ReadClock.Holidays", "ReadClock.Holidays[2]"):
+        assert index.resolve(name) == {"error": f"Address '{name}' is a structure or an array - use one of its members."}
@@ -0,0 +1,75 @@
+# Write coalescing (write_queue.py)
+
+import asyncio
+
+import pytest
+
+from wago_visu_client import ConnectionError as APIConnectionError
+
+from wago_plc.write_queue import WriteQueue
+
+
+class StubConnection:
+    """Stand-in for PLCConnection recording the write requests, failing the first 'failures'."""
+
+    def __init__(self, failures: int = 0, delay: float = 0) -> None:
+        self.failures = failures
+        self.delay = delay
+        self.requests: list[list[tuple[str, str]]] = []
+
+    async def set_data_multi(self, writes: list[tuple[str, str]]) -> None:
+        self.requests.append(writes)
+        await asyncio.sleep(self.delay)
+        if len(self.requests) <= self.failures:
+            raise APIConnectionError("PLC not reachable")
+
+
+async def queue_writes(queue: WriteQueue, writes: list[tuple[str, int]]) -> list:
+    tasks = [asyncio.create_task(queue.write(address, value)) for address, value in writes]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_repeated_address_starts_next_batch():
+    async def run() -> None:
+        connection = StubConnection()
+        queue = WriteQueue(connection, window=0.01)
+
+        results = await queue_writes(queue, [("A", 1), ("B", 1), ("A", 0)])
+
+        assert results == [None, None, None]
+        assert connection.requests == [[("A", "1"), ("B", "1")], [("A", "0")]]
+
+    asyncio.run(run())
+
+
+def test_failed_batch_fails_later_batches():
+    """A=0 must not be written when A=1 (queued before it) was not applied."""
+    async def run() -> None:
+        connection = StubConnection(failures=1)
+        queue = WriteQueue(connection, window=0.01)
+
+        results = await queue_writes(queue, [("A", 1), ("B", 1), ("A", 0)])
+
+        assert connection.requests == [[("A", "1"), ("B", "1")]]
+        assert all(isinstance(result, APIConnectionError) for result in results)
+        assert queue.failed_batches == 1
+
+    asyncio.run(run())
+
+
+def test_shutdown_during_flush_fails_writers():
+    """Writes of a flush cancelled by shutdown() fail instead of waiting forever."""
+    async def run() -> None:
+        connection = StubConnection(delay=10)
+        queue = WriteQueue(connection, window=0.01)
+
+        task = asyncio.create_task(queue_writes(queue, [("A", 1), ("B", 1), ("A", 0)]))
+        while not connection.requests:
+            await asyncio.sleep(0.01)
+        queue.shutdown()
+
+        results = await asyncio.wait_for(task, 1)
+        assert connection.requests == [[("A", "1"), ("B", "1")]]
+        assert all(isinstance(result, APIConnectionError) for result in results)
+
+    asyncio.run(run())
@@ -0,0 +1,108 @@
+# Last known values of the PLC, kept across restarts
+
+import logging
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, VALUE_CACHE_SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class ValueCache:
+    """Snapshot of the values read from the PLC, stored with HA's Store helper.
+
+    Values are kept per PLC address (not per element), so after a new SYM file moved
+    the variables, stale values simply do not match any address. On startup the
+    snapshot is put back into the value tables, so entities are available at once
+    (their coordinator is marked 'stale' until its first poll succeeds).
+    Saving is throttled - at most one write every VALUE_CACHE_SAVE_DELAY seconds.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.values")
+        self._coordinators: list[Any] = []
+        self._polled: dict[str, float] = {}  # {group name: unix time of the last full poll}
+        self._save_pending = False
+
+    def add(self, coordinator: Any) -> None:
+        """Register a coordinator group whose values are kept."""
+        self._coordinators.append(coordinator)
+        coordinator.value_cache = self
+
+    def remove(self, coordinator: Any) -> None:
+        """Stop keeping the values of a coordinator group which was removed."""
+        if coordinator in self._coordinators:
+            self._coordinators.remove(coordinator)
+        self._polled.pop(coordinator.group_name, None)
+        coordinator.value_cache = None
+
+    async def async_restore(self) -> set[str]:
+        """Put the stored values back into the value tables; return the names of restored groups."""
+        data = await self._store.async_load()
+        if not data:
+            return set()
+
+        values: dict[str, str] = data.get("values", {})
+        self._polled = data.get("polled", {})
+
+        restored = set()
+        for coordinator in self._coordinators:
+            count = 0
+            table = coordinator.read_plan.table.values
+            for addr, slot in zip(coordinator.read_plan.addrs, coordinator.read_plan.slots):
+                if addr in values and table[slot] is None:
+                    table[slot] = values[addr]
+                    count += 1
+            if count:
+                coordinator.stale = True
+                restored.add(coordinator.group_name)
+                _LOGGER.debug("%s coordinator - restored %d of %d values", coordinator.group_name, count, len(coordinator.read_plan.addrs))
+
+        return restored
+
+    def age(self, group_name: str) -> float | None:
+        """Return seconds since the last full poll of a group (also before the restart), or None."""
+        if (polled := self._polled.get(group_name)) is None:
+            return None
+        return max(0.0, time.time() - polled)
+
+    @callback
+    def async_polled(self, group_name: str, changed: Iterable[Any] | None) -> None:
+        """Record a successful full poll of a group; save if values changed."""
+        self._polled[group_name] = time.time()
+        if changed is None or changed:
+            self.async_schedule_save()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        # Store.async_delay_save postpones the write on every call - a poll every few seconds
+        # would push it out forever, so it is called only when no write is pending
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._snapshot, VALUE_CACHE_SAVE_DELAY)
+
+    def _snapshot(self) -> dict[str, Any]:
+        self._save_pending = False
+        values: dict[str, str] = {}
+        for coordinator in self._coordinators:
+            table = coordinator.read_plan.table.values
+            for addr, slot in zip(coordinator.read_plan.addrs, coordinator.read_plan.slots):
+                if (value := table[slot]) is not None:
+                    values[addr] = value
+        return {"values": values, "polled": self._polled}
+
+    async def async_save(self) -> None:
+        """Write the snapshot now (on unload, so a reload restores the latest values)."""
+        await self._store.async_save(self._snapshot())
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
@@ -0,0 +1,191 @@
+# Coalescing write queue in front of wago_visu_client.WagoPLC.set_data
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from wago_visu_client import WagoPLC as API
+from wago_visu_client import ConnectionError as APIConnectionError
+
+from .const import DEFAULT_WRITE_BATCH_SIZE, DEFAULT_WRITE_WINDOW
+from .metrics import DURATION_BUCKETS_MS, Histogram
+
+if TYPE_CHECKING:
+    from .connection import PLCConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def set_data_multi(api: API, writes: list[tuple[str, str]]) -> None:
+    """Write several addresses in one webvisu request.
+
+    The visu write request is "|1|<count>|<index>|<address>|<value>|..." - the client
+    library only sends it with a single address, so longer requests are built here.
+    """
+    if len(writes) == 1:
+        await api.set_data(*writes[0])
+        return
+
+    payload_parts = [f"|1|{len(writes)}"]
+    for index, (address, value) in enumerate(writes):
+        payload_parts.append(f"|{index}|{address}|{value}")
+    payload = "".join(payload_parts) + "|"
+
+    url = f"http://{api.host}/PLC/webvisu.htm"
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    try:
+        # the timeouts of the session apply (see connection.create_session)
+        async with api.session.post(url, data=payload, headers=headers) as response:
+            response.raise_for_status()
+            text = await response.text()
+    except asyncio.TimeoutError as err:
+        raise APIConnectionError(f"Connection timeout: {err}") from err
+    except aiohttp.ClientError as err:
+        raise APIConnectionError(f"Request failed: {err}") from err
+
+    # Check for success response (|0|)
+    if text.strip() != "|0|":
+        raise APIConnectionError(f"PLC write failed with response: {text}")
+
+
+class WriteQueue:
+    """Per-host queue merging writes made within a short window into one request.
+
+    Writes are kept in the order they were queued. A batch never holds the same
+    address twice - a repeated address starts the next batch, which is sent only
+    after the previous one was applied. When a batch fails, the later batches of
+    the same flush fail with the same error without being sent. After the writes
+    are applied, a refresh of every coordinator passed along with them is
+    scheduled once.
+    """
+
+    def __init__(self, api: "PLCConnection", window: float = DEFAULT_WRITE_WINDOW, batch_size: int = DEFAULT_WRITE_BATCH_SIZE) -> None:
+        self.api = api
+        self.window = window
+        self.batch_size = batch_size
+
+        self._pending: list[tuple[str, str, asyncio.Future, Any, float, Any]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()  # one flush at a time keeps batches in order
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0          # write requests sent
+        self.values_written = 0
+        self.failed_batches = 0
+        self.write_latency = Histogram(DURATION_BUCKETS_MS)  # ms per write request
+
+    async def write(self, address: str, value: Any, coordinator: Any = None, settle: float = 0, device_id: Any = None) -> None:
+        """Queue one write and wait until it is applied."""
+        await self.write_many([(address, value)], coordinator, settle, device_id)
+
+    async def write_many(self, writes: list[tuple[str, Any]], coordinator: Any = None, settle: float = 0, device_id: Any = None) -> None:
+        """Queue writes (in order) and wait until all of them are applied.
+
+        'coordinator' is refreshed once the batch is applied, 'settle' seconds later -
+        only the given device if 'device_id' is set, the whole group otherwise.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for address, value in writes:
+            future = loop.create_future()
+            self._pending.append((address, str(value), future, coordinator, settle, device_id))
+            futures.append(future)
+
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._start_flush)
+
+        for result in await asyncio.gather(*futures, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        self._track(asyncio.create_task(self._flush()))
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _batches(self, pending: list) -> list[list]:
+        """Split pending writes into batches without repeated addresses."""
+        batches: list[list] = [[]]
+        addresses: set[str] = set()
+        for item in pending:
+            if item[0] in addresses or len(batches[-1]) >= self.batch_size:
+                batches.append([])
+                addresses = set()
+            batches[-1].append(item)
+            addresses.add(item[0])
+        return batches
+
+    async def _flush(self) -> None:
+        async with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            refresh: dict[Any, tuple[float, set[Any] | None]] = {}
+            error: Exception | None = None
+            try:
+                for batch in self._batches(pending):
+                    if error is not None:
+                        # later writes must not overtake the ones which were not applied
+                        for _, _, future, *_ in batch:
+                            if not future.done():
+                                future.set_exception(error)
+                        continue
+
+                    self.batches += 1
+                    start = time.perf_counter()
+                    try:
+                        # fails at once while the PLC is known to be down (see connection.py)
+                        await self.api.set_data_multi([(address, value) for address, value, *_ in batch])
+                    except Exception as err:
+                        self.failed_batches += 1
+                        _LOGGER.error("Writing %d values to the PLC failed: %s", len(batch), err)
+                        for _, _, future, *_ in batch:
+                            if not future.done():
+                                future.set_exception(err)
+                        error = err
+                        continue
+
+                    self.write_latency.record((time.perf_counter() - start) * 1000)
+                    self.values_written += len(batch)
+                    _LOGGER.debug("Wrote %d values to the PLC in one request", len(batch))
+                    for _, _, future, coordinator, settle, device_id in batch:
+                        if not future.done():
+                            future.set_result(None)
+                        if coordinator is not None:
+                            delay, device_ids = refresh.get(coordinator, (0, set()))
+                            if device_id is None:
+                                device_ids = None
+                            elif device_ids is not None:
+                                device_ids.add(device_id)
+                            refresh[coordinator] = (max(settle, delay), device_ids)
+            except asyncio.CancelledError:
+                # shut down in the middle of the flush - the writers must not wait forever
+                for _, _, future, *_ in pending:
+                    if not future.done():
+                        future.set_exception(APIConnectionError("Write queue shut down"))
+                raise
+
+        # one refresh per coordinator for everything written in this flush - the
+        # coordinator's refresh scheduler merges it with requests of other flushes
+        for coordinator, (settle, device_ids) in refresh.items():
+            coordinator.refresh_scheduler.async_schedule(settle, device_ids)
+
+    def shutdown(self) -> None:
+        """Cancel queued writes."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for _, _, future, *_ in self._pending:
+            if not future.done():
+                future.set_exception(APIConnectionError("Write queue shut down"))
+        self._pending = []
+        for task in self._tasks:
+            task.cancel()